@@ -16,6 +16,9 @@ from app.models.workout import Workout
 from app.models.achievement import Achievement
 from app.models.subscription import Subscription
 from app.models.weight_log import WeightLog
+from app.models.product import Product, ProductImport
+from app.models.daily_nutrition import DailyNutrition
+from app.models.chat_member import ChatMember
 
 config = context.config
 if config.config_file_name is not None:
@@ -0,0 +1,130 @@
+"""Baseline schema
+
+The schema as it stood before migrations were introduced. Existing
+databases are stamped at this revision and upgraded from here, so it must
+not grow tables added later.
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "0001_baseline"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("tg_id", sa.BigInteger(), nullable=False),
+        sa.Column("username", sa.String(100)),
+        sa.Column("first_name", sa.String(100)),
+        sa.Column("goal", sa.String(10), nullable=False),
+        sa.Column("gender", sa.String(10)),
+        sa.Column("age", sa.Integer()),
+        sa.Column("weight_kg", sa.Float()),
+        sa.Column("height_cm", sa.Float()),
+        sa.Column("target_weight_kg", sa.Float()),
+        sa.Column("activity_level", sa.String(20)),
+        sa.Column("daily_calories", sa.Integer()),
+        sa.Column("daily_protein_g", sa.Integer()),
+        sa.Column("daily_fat_g", sa.Integer()),
+        sa.Column("daily_carbs_g", sa.Integer()),
+        sa.Column("level", sa.Integer()),
+        sa.Column("xp", sa.Integer()),
+        sa.Column("xp_to_next_level", sa.Integer()),
+        sa.Column("streak_days", sa.Integer()),
+        sa.Column("max_streak_days", sa.Integer()),
+        sa.Column("last_streak_date", sa.Date()),
+        sa.Column("trial_started_at", sa.DateTime()),
+        sa.Column("subscription_status", sa.String(20)),
+        sa.Column("subscription_expires_at", sa.DateTime()),
+        sa.Column("onboarding_completed", sa.Integer()),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+        sa.Column("last_active_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+    op.create_index("ix_users_tg_id", "users", ["tg_id"], unique=True)
+
+    op.create_table(
+        "food_log",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("logged_at", sa.DateTime(), server_default=sa.func.now()),
+        sa.Column("meal_type", sa.String(20)),
+        sa.Column("food_name", sa.String(200), nullable=False),
+        sa.Column("calories", sa.Float(), nullable=False),
+        sa.Column("protein_g", sa.Float()),
+        sa.Column("fat_g", sa.Float()),
+        sa.Column("carbs_g", sa.Float()),
+        sa.Column("weight_g", sa.Float()),
+        sa.Column("source", sa.String(20)),
+        sa.Column("photo_url", sa.Text()),
+        sa.Column("ai_confidence", sa.Float()),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+
+    op.create_table(
+        "workouts",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("workout_date", sa.Date(), nullable=False),
+        sa.Column("completed", sa.Boolean()),
+        sa.Column("notes", sa.Text()),
+        sa.Column("xp_awarded", sa.Integer()),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now()),
+        sa.UniqueConstraint("user_id", "workout_date", name="uq_user_workout_date"),
+    )
+
+    op.create_table(
+        "achievements",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("achievement_code", sa.String(50), nullable=False),
+        sa.Column("achieved_at", sa.DateTime(), server_default=sa.func.now()),
+        sa.Column("notified", sa.Boolean()),
+        sa.UniqueConstraint("user_id", "achievement_code", name="uq_user_achievement"),
+    )
+
+    op.create_table(
+        "subscriptions",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("telegram_payment_id", sa.Text(), unique=True),
+        sa.Column("stars_amount", sa.Integer()),
+        sa.Column("status", sa.String(20)),
+        sa.Column("period_days", sa.Integer()),
+        sa.Column("starts_at", sa.DateTime()),
+        sa.Column("expires_at", sa.DateTime()),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+
+    op.create_table(
+        "weight_log",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("weight_kg", sa.Float(), nullable=False),
+        sa.Column("logged_date", sa.Date(), server_default=sa.func.current_date()),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+        sa.UniqueConstraint("user_id", "logged_date", name="uq_user_weight_date"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("weight_log")
+    op.drop_table("subscriptions")
+    op.drop_table("achievements")
+    op.drop_table("workouts")
+    op.drop_table("food_log")
+    op.drop_index("ix_users_tg_id", table_name="users")
+    op.drop_table("users")
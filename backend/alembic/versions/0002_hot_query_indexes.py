@@ -0,0 +1,59 @@
+"""Indexes for hot per-user queries
+
+Revision ID: 0002_hot_query_indexes
+Revises: 0001_baseline
+Create Date: 2026-10-17 00:10:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0002_hot_query_indexes"
+down_revision: Union[str, None] = "0001_baseline"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY keeps food_log writable while the indexes build on a live table
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_food_log_user_logged_at",
+            "food_log",
+            ["user_id", "logged_at"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_food_log_user_created_at",
+            "food_log",
+            ["user_id", sa.text("created_at DESC")],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_workouts_user_completed_date",
+            "workouts",
+            ["user_id", "workout_date"],
+            postgresql_where=sa.text("completed IS true"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_subscriptions_user_id",
+            "subscriptions",
+            ["user_id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_subscriptions_user_id", table_name="subscriptions", postgresql_concurrently=True)
+        op.drop_index("ix_workouts_user_completed_date", table_name="workouts", postgresql_concurrently=True)
+        op.drop_index("ix_food_log_user_created_at", table_name="food_log", postgresql_concurrently=True)
+        op.drop_index("ix_food_log_user_logged_at", table_name="food_log", postgresql_concurrently=True)
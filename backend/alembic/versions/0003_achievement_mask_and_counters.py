@@ -0,0 +1,74 @@
+"""Achievement bitmask and gamification counters on users
+
+Revision ID: 0003_achievement_mask_counters
+Revises: 0002_hot_query_indexes
+Create Date: 2026-10-17 00:20:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0003_achievement_mask_counters"
+down_revision: Union[str, None] = "0002_hot_query_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# ACHIEVEMENT_BITS order at the time of this revision
+ACHIEVEMENT_CODES = (
+    "streak_7",
+    "streak_30",
+    "streak_100",
+    "first_photo",
+    "first_week",
+    "workouts_10",
+    "workouts_50",
+    "workouts_100",
+    "goal_reached",
+    "level_10",
+)
+
+
+def upgrade() -> None:
+    for name, column_type in (
+        ("achievements_mask", sa.BigInteger()),
+        ("workouts_completed", sa.Integer()),
+        ("photos_analyzed", sa.Integer()),
+        ("logging_days", sa.Integer()),
+    ):
+        op.add_column("users", sa.Column(name, column_type, nullable=False, server_default="0"))
+
+    # Backfill from history; app.scripts.gamification_repair does the same later on
+    bit_case = " ".join(
+        f"WHEN '{code}' THEN {1 << index}" for index, code in enumerate(ACHIEVEMENT_CODES)
+    )
+    op.execute(f"""
+        UPDATE users u SET achievements_mask = m.mask
+        FROM (
+            SELECT user_id, bit_or(CASE achievement_code {bit_case} ELSE 0 END::bigint) AS mask
+            FROM achievements GROUP BY user_id
+        ) m
+        WHERE m.user_id = u.id
+    """)
+    op.execute("""
+        UPDATE users u SET workouts_completed = w.n
+        FROM (SELECT user_id, count(*) AS n FROM workouts WHERE completed IS true GROUP BY user_id) w
+        WHERE w.user_id = u.id
+    """)
+    op.execute("""
+        UPDATE users u SET photos_analyzed = p.n
+        FROM (SELECT user_id, count(*) AS n FROM food_log WHERE source = 'ai_photo' GROUP BY user_id) p
+        WHERE p.user_id = u.id
+    """)
+    op.execute("""
+        UPDATE users u SET logging_days = d.n
+        FROM (SELECT user_id, count(DISTINCT date(logged_at)) AS n FROM food_log GROUP BY user_id) d
+        WHERE d.user_id = u.id
+    """)
+
+
+def downgrade() -> None:
+    for name in ("logging_days", "photos_analyzed", "workouts_completed", "achievements_mask"):
+        op.drop_column("users", name)
@@ -0,0 +1,54 @@
+"""Workout streak columns on users
+
+Revision ID: 0004_workout_streaks
+Revises: 0003_achievement_mask_counters
+Create Date: 2026-10-17 02:10:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0004_workout_streaks"
+down_revision: Union[str, None] = "0003_achievement_mask_counters"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("users", sa.Column("current_workout_streak", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("users", sa.Column("best_workout_streak", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("users", sa.Column("last_workout_date", sa.Date()))
+
+    # Gaps and islands over completed workouts; see gamification_service.workout_streak_select
+    op.execute("""
+        UPDATE users u
+        SET current_workout_streak = s.current_streak,
+            best_workout_streak = s.best_streak,
+            last_workout_date = s.last_date
+        FROM (
+            SELECT user_id,
+                   (array_agg(length ORDER BY run_end DESC))[1] AS current_streak,
+                   max(length) AS best_streak,
+                   max(run_end) AS last_date
+            FROM (
+                SELECT user_id, count(*) AS length, max(workout_date) AS run_end
+                FROM (
+                    SELECT user_id, workout_date,
+                           workout_date - (row_number() OVER (PARTITION BY user_id ORDER BY workout_date))::int AS island
+                    FROM workouts
+                    WHERE completed IS true
+                ) days
+                GROUP BY user_id, island
+            ) runs
+            GROUP BY user_id
+        ) s
+        WHERE s.user_id = u.id
+    """)
+
+
+def downgrade() -> None:
+    for name in ("last_workout_date", "best_workout_streak", "current_workout_streak"):
+        op.drop_column("users", name)
@@ -0,0 +1,25 @@
+"""Per-user data version for conditional GETs
+
+Revision ID: 0005_user_data_version
+Revises: 0004_workout_streaks
+Create Date: 2026-10-17 03:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0005_user_data_version"
+down_revision: Union[str, None] = "0004_workout_streaks"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("users", sa.Column("data_version", sa.BigInteger(), nullable=False, server_default="0"))
+
+
+def downgrade() -> None:
+    op.drop_column("users", "data_version")
@@ -0,0 +1,38 @@
+"""Chat members for chat-scoped leaderboards
+
+Revision ID: 0006_chat_members
+Revises: 0005_user_data_version
+Create Date: 2026-10-17 04:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "0006_chat_members"
+down_revision: Union[str, None] = "0005_user_data_version"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "chat_members",
+        sa.Column("chat_instance", sa.String(64), primary_key=True),
+        sa.Column(
+            "user_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("users.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("seen_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_index("ix_chat_members_chat_seen", "chat_members", ["chat_instance", "seen_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_chat_members_chat_seen", table_name="chat_members")
+    op.drop_table("chat_members")
@@ -0,0 +1,56 @@
+"""Offline products catalog and dump import checkpoints
+
+Revision ID: 0007_products
+Revises: 0006_chat_members
+Create Date: 2026-10-17 05:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0007_products"
+down_revision: Union[str, None] = "0006_chat_members"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    op.create_table(
+        "products",
+        sa.Column("code", sa.String(32), primary_key=True),
+        sa.Column("name", sa.String(300), nullable=False),
+        sa.Column("name_normalized", sa.String(300), nullable=False),
+        sa.Column("brand", sa.String(200)),
+        sa.Column("calories", sa.Float(), nullable=False),
+        sa.Column("protein", sa.Float()),
+        sa.Column("fat", sa.Float()),
+        sa.Column("carbs", sa.Float()),
+        sa.Column("source", sa.String(20)),
+        sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+    op.create_index(
+        "ix_products_name_trgm",
+        "products",
+        ["name_normalized"],
+        postgresql_using="gin",
+        postgresql_ops={"name_normalized": "gin_trgm_ops"},
+    )
+
+    op.create_table(
+        "product_imports",
+        sa.Column("source", sa.Text(), primary_key=True),
+        sa.Column("records_done", sa.BigInteger(), nullable=False),
+        sa.Column("rows_loaded", sa.BigInteger(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("product_imports")
+    op.drop_index("ix_products_name_trgm", table_name="products")
+    op.drop_table("products")
@@ -0,0 +1,45 @@
+"""Per-user, per-day nutrition rollup of food_log
+
+Revision ID: 0008_daily_nutrition
+Revises: 0007_products
+Create Date: 2026-10-17 05:10:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app.services.nutrition_service import MACRO_FIELDS, rollup_select
+
+# revision identifiers, used by Alembic.
+revision: str = "0008_daily_nutrition"
+down_revision: Union[str, None] = "0007_products"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "daily_nutrition",
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("calories", sa.Float(), nullable=False),
+        sa.Column("protein_g", sa.Float(), nullable=False),
+        sa.Column("fat_g", sa.Float(), nullable=False),
+        sa.Column("carbs_g", sa.Float(), nullable=False),
+        sa.Column("entry_count", sa.Integer(), nullable=False),
+        sa.Column("meal_mask", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+
+    # Fill the rollup from existing history in the same transaction, so
+    # /food/log and /food/stats are right as soon as the new code serves them
+    columns = ["user_id", "day", *MACRO_FIELDS, "entry_count", "meal_mask"]
+    daily_nutrition = sa.table("daily_nutrition", *(sa.column(name) for name in columns))
+    op.execute(daily_nutrition.insert().from_select(columns, rollup_select()))
+
+
+def downgrade() -> None:
+    op.drop_table("daily_nutrition")
@@ -0,0 +1,34 @@
+"""Prefix index on products for short search queries
+
+Revision ID: 0009_products_name_prefix
+Revises: 0008_daily_nutrition
+Create Date: 2026-10-17 05:20:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0009_products_name_prefix"
+down_revision: Union[str, None] = "0008_daily_nutrition"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY keeps search available while the index builds over an imported dump
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_products_name_prefix",
+            "products",
+            ["name_normalized"],
+            postgresql_ops={"name_normalized": "text_pattern_ops"},
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_products_name_prefix", table_name="products", postgresql_concurrently=True)
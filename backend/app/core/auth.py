@@ -4,8 +4,9 @@ import hashlib
 import hmac
 import json
 import time
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
-from urllib.parse import parse_qs, unquote
+from urllib.parse import unquote_plus
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
@@ -16,44 +17,104 @@ from app.core.config import get_settings
 settings = get_settings()
 security = HTTPBearer()
 
+if settings.JWT_BACKEND == "pyjwt":
+    import jwt as pyjwt
+
+# Verified claims keyed by SHA-256 of the token; entries expire at the token's `exp`
+_token_cache: OrderedDict[bytes, tuple[dict, float]] = OrderedDict()
+
+# initData is accepted for 5 minutes after auth_date. Each hash is remembered
+# for that window with the user it logged in and the token it was given
+INIT_DATA_MAX_AGE = 300
+_WEBAPP_SECRET_KEY = hmac.new(b"WebAppData", settings.TELEGRAM_BOT_TOKEN.encode(), hashlib.sha256).digest()
+_seen_init_data: OrderedDict[str, tuple[int, str, float]] = OrderedDict()
+
+
+def _parse_init_data(init_data: str) -> dict[str, str]:
+    """Split initData into key/value pairs; the first value wins, like parse_qs()[0]."""
+    fields = {}
+    for pair in init_data.split("&"):
+        key, sep, value = pair.partition("=")
+        if not sep or key in fields:
+            continue
+        if "%" in value or "+" in value:
+            value = unquote_plus(value)
+        fields[key] = value
+    return fields
+
+
+def _purge_seen_init_data(now: float) -> None:
+    while _seen_init_data:
+        oldest_hash, (_, _, oldest_expiry) = next(iter(_seen_init_data.items()))
+        if oldest_expiry > now:
+            break
+        del _seen_init_data[oldest_hash]
+
+
+def issue_login_token(init_data: dict, claims: dict) -> str:
+    """
+    JWT for a login with verified initData.
+    A repeat of the same initData within its window (StrictMode double
+    effects, Mini App reloads) gets the token issued the first time, so a
+    replay never mints new credentials; reuse for another user is rejected.
+    """
+    received_hash = init_data["hash"]
+    tg_id = claims["tg_id"]
+    now = time.time()
+    _purge_seen_init_data(now)
+
+    seen = _seen_init_data.get(received_hash)
+    if seen is not None:
+        seen_tg_id, token, _ = seen
+        if seen_tg_id != tg_id:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="initData already used",
+            )
+        return token
+
+    token = create_access_token(claims)
+    _seen_init_data[received_hash] = (tg_id, token, int(init_data["auth_date"]) + INIT_DATA_MAX_AGE)
+    while len(_seen_init_data) > settings.TELEGRAM_REPLAY_CACHE_MAX_ENTRIES:
+        _seen_init_data.popitem(last=False)
+    return token
+
 
 def validate_telegram_init_data(init_data: str) -> dict:
     """
     Validate Telegram Mini App initData using HMAC-SHA256.
-    Returns the parsed user data if valid.
-    Raises HTTPException if invalid.
+    Returns the verified fields, with `user` decoded from JSON and `hash`
+    kept for issue_login_token.
+    Raises HTTPException if invalid or expired.
     """
-    parsed = parse_qs(init_data)
+    parsed = _parse_init_data(init_data)
 
-    if "hash" not in parsed:
+    received_hash = parsed.pop("hash", None)
+    if not received_hash:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Missing hash in initData",
         )
 
-    received_hash = parsed.pop("hash")[0]
-
     # Check auth_date is within 5 minutes
-    if "auth_date" in parsed:
-        auth_date = int(parsed["auth_date"][0])
-        if abs(time.time() - auth_date) > 300:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="initData expired (auth_date too old)",
-            )
+    try:
+        auth_date = int(parsed["auth_date"])
+    except (KeyError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Missing auth_date in initData",
+        )
+    if abs(time.time() - auth_date) > INIT_DATA_MAX_AGE:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="initData expired (auth_date too old)",
+        )
 
     # Build the data-check string
-    data_check_pairs = []
-    for key in sorted(parsed.keys()):
-        data_check_pairs.append(f"{key}={parsed[key][0]}")
-    data_check_string = "\n".join(data_check_pairs)
-
-    # Compute HMAC-SHA256
-    secret_key = hmac.new(
-        b"WebAppData", settings.TELEGRAM_BOT_TOKEN.encode(), hashlib.sha256
-    ).digest()
+    data_check_string = "\n".join(f"{key}={parsed[key]}" for key in sorted(parsed))
+
     computed_hash = hmac.new(
-        secret_key, data_check_string.encode(), hashlib.sha256
+        _WEBAPP_SECRET_KEY, data_check_string.encode(), hashlib.sha256
     ).hexdigest()
 
     if not hmac.compare_digest(computed_hash, received_hash):
@@ -63,11 +124,10 @@ def validate_telegram_init_data(init_data: str) -> dict:
         )
 
     # Parse user JSON
-    user_data = {}
-    if "user" in parsed:
-        user_data = json.loads(unquote(parsed["user"][0]))
+    parsed["user"] = json.loads(parsed["user"]) if "user" in parsed else {}
+    parsed["hash"] = received_hash
 
-    return user_data
+    return parsed
 
 
 def create_access_token(data: dict) -> str:
@@ -80,19 +140,50 @@ def create_access_token(data: dict) -> str:
     return jwt.encode(to_encode, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
 
 
+def _decode_token(token: str) -> dict:
+    """Full signature and claims verification with the configured JWT backend."""
+    if settings.JWT_BACKEND == "pyjwt":
+        try:
+            return pyjwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+        except pyjwt.PyJWTError:
+            raise JWTError("Invalid token")
+    return jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+
+
 def verify_token(token: str) -> dict:
-    """Verify and decode a JWT token."""
+    """
+    Verify and decode a JWT token.
+    Verified claims are cached until `exp`, so repeat requests with the
+    same token skip HMAC verification and JSON parsing.
+    """
+    key = hashlib.sha256(token.encode()).digest()
+    now = time.time()
+
+    cached = _token_cache.get(key)
+    if cached is not None:
+        claims, expires_at = cached
+        if expires_at > now:
+            _token_cache.move_to_end(key)
+            return dict(claims)
+        del _token_cache[key]
+
     try:
-        payload = jwt.decode(
-            token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM]
-        )
-        return payload
+        payload = _decode_token(token)
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired token",
         )
 
+    # Tokens without exp are never cached
+    expires_at = payload.get("exp")
+    if isinstance(expires_at, (int, float)) and expires_at > now:
+        _token_cache[key] = (dict(payload), float(expires_at))
+        while len(_token_cache) > settings.JWT_CACHE_MAX_ENTRIES:
+            _token_cache.popitem(last=False)
+
+    return payload
+
 
 async def get_current_user_id(
     credentials: HTTPAuthorizationCredentials = Depends(security),
@@ -106,3 +197,10 @@ async def get_current_user_id(
             detail="Token missing user ID",
         )
     return user_id
+
+
+async def get_current_chat_instance(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+) -> str | None:
+    """FastAPI dependency: the signed chat_instance the Mini App was opened from, if any."""
+    return verify_token(credentials.credentials).get("chat")
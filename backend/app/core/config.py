@@ -1,5 +1,8 @@
 """Application configuration loaded from environment variables."""
 
+from typing import Literal
+
+from pydantic import field_validator
 from pydantic_settings import BaseSettings
 from functools import lru_cache
 
@@ -22,16 +25,82 @@ class Settings(BaseSettings):
     JWT_SECRET_KEY: str = "change-me-in-production"
     JWT_ALGORITHM: str = "HS256"
     JWT_ACCESS_TOKEN_EXPIRE_HOURS: int = 24
+    JWT_BACKEND: str = "jose"  # jose | pyjwt (faster decode, install PyJWT)
+    JWT_CACHE_MAX_ENTRIES: int = 10000
+    TELEGRAM_REPLAY_CACHE_MAX_ENTRIES: int = 100000
 
     # Supabase
     SUPABASE_URL: str = ""
     SUPABASE_SERVICE_KEY: str = ""
 
+    # Outbound HTTP
+    OPEN_FOOD_FACTS_URL: str = "https://world.openfoodfacts.org"
+    HTTP_MAX_CONNECTIONS: int = 50
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    OPEN_FOOD_FACTS_BARCODE_CONCURRENCY: int = 4  # product API calls in flight per process
+
+    # Circuit breakers for Open Food Facts and OpenAI
+    CIRCUIT_FAILURE_RATE: float = 0.5
+    CIRCUIT_WINDOW: int = 20
+    CIRCUIT_MIN_CALLS: int = 5
+    CIRCUIT_OPEN_SECONDS: float = 30.0
+    OPEN_FOOD_FACTS_SLOW_CALL_SECONDS: float = 2.0
+    OPENAI_SLOW_CALL_SECONDS: float = 15.0
+
+    # Food search cache (seconds)
+    FOOD_SEARCH_CACHE_TTL: int = 86400
+    FOOD_SEARCH_NEGATIVE_TTL: int = 300
+    FOOD_SEARCH_STALE_TTL: int = 3600
+    FOOD_SEARCH_CACHE_MAX_ENTRIES: int = 10000
+
+    # User profile cache (seconds)
+    USER_PROFILE_CACHE_TTL: int = 300
+    USER_PROFILE_CACHE_MAX_ENTRIES: int = 50000
+
+    # Per-user data versions behind ETags (seconds kept in Redis)
+    DATA_VERSION_TTL: int = 300
+
+    # AI photo analysis jobs (status shared via Redis; without Redis, job polling needs a single worker)
+    PHOTO_JOB_WORKERS: int = 8
+    PHOTO_JOB_QUEUE_SIZE: int = 100
+    PHOTO_JOB_TIMEOUT: float = 30.0
+    PHOTO_JOB_RESULT_TTL: int = 600
+    PHOTO_MAX_UPLOAD_BYTES: int = 15 * 1024 * 1024
+
+    # AI rate limits per subscription tier ("count/period"; "default" covers other tiers)
+    AI_PHOTO_RATE_LIMITS: dict[str, str] = {"default": "10/hour"}
+
+    # Analysis results for identical / near-duplicate photos (dHash Hamming distance)
+    PHOTO_CACHE_TTL: int = 7 * 86400
+    PHOTO_CACHE_MAX_DISTANCE: int = 6
+    PHOTO_CACHE_MAX_ENTRIES: int = 20000
+    PHOTO_CACHE_MIN_CONFIDENCE: float = 0.6
+
+    # Photo preprocessing (detail="low" analyses at most 512x512)
+    IMAGE_MAX_SIDE: int = 512
+    IMAGE_OUTPUT_FORMAT: Literal["JPEG", "WEBP"] = "JPEG"  # case-insensitive in env
+    IMAGE_QUALITY: int = 85
+    IMAGE_PROCESS_WORKERS: int = 2
+
+    # Leaderboards (seconds the in-process fallback snapshot / active streak union is reused)
+    LEADERBOARD_SNAPSHOT_TTL: int = 60
+    LEADERBOARD_PAGE_SIZE: int = 50
+    LEADERBOARD_GROUP_MAX_MEMBERS: int = 200  # most recently seen members of a chat board
+
+    # Food catalog (compiled by app.scripts.build_food_catalog)
+    FOOD_CATALOG_PATH: str = "data/food_catalog.bin"
+
     # App
     ENVIRONMENT: str = "development"
     API_V1_PREFIX: str = "/v1"
     FRONTEND_URL: str = "http://localhost:5173"
 
+    @field_validator("IMAGE_OUTPUT_FORMAT", mode="before")
+    @classmethod
+    def _upper_image_format(cls, value):
+        # Pillow format names are upper case; "webp" in .env should not fail every upload
+        return value.strip().upper() if isinstance(value, str) else value
+
     class Config:
         env_file = ".env"
         case_sensitive = True
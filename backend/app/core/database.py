@@ -1,5 +1,7 @@
 """Async SQLAlchemy database engine and session management."""
 
+from contextlib import asynccontextmanager
+
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from app.core.config import get_settings
 
@@ -19,14 +21,28 @@ async_session_factory = async_sessionmaker(
 )
 
 
-async def get_db() -> AsyncSession:
-    """FastAPI dependency that provides an async database session."""
+def after_commit(session: AsyncSession, callback) -> None:
+    """Run an async `callback()` once the request's transaction has committed."""
+    session.info.setdefault("after_commit", []).append(callback)
+
+
+@asynccontextmanager
+async def session_scope():
+    """A session that commits (then runs after-commit callbacks) or rolls back on exit."""
     async with async_session_factory() as session:
         try:
             yield session
             await session.commit()
+            for callback in session.info.pop("after_commit", []):
+                await callback()
         except Exception:
             await session.rollback()
             raise
         finally:
             await session.close()
+
+
+async def get_db() -> AsyncSession:
+    """FastAPI dependency that provides an async database session."""
+    async with session_scope() as session:
+        yield session
@@ -0,0 +1,52 @@
+"""Shared outbound HTTP client — one keep-alive connection pool per process."""
+
+import httpx
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Per-phase budget: fail fast on connect/pool waits, allow a slower body read
+TIMEOUT = httpx.Timeout(connect=2.0, read=4.0, write=2.0, pool=1.0)
+
+_client: httpx.AsyncClient | None = None
+
+
+def _create_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=HTTP2_AVAILABLE,
+        timeout=TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=30.0,
+        ),
+        headers={"User-Agent": "NutriBot/1.0 (+https://t.me/NutriBotSupport)"},
+    )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared client, creating it lazily outside the app lifespan."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _create_client()
+    return _client
+
+
+async def init_http_client() -> httpx.AsyncClient:
+    """Create the shared client up front. Called from the app lifespan."""
+    return get_http_client()
+
+
+async def close_http_client() -> None:
+    """Close the shared client and its pooled connections."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,44 @@
+"""Optional shared Redis connection — every caller must handle `None`."""
+
+from redis.asyncio import Redis
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+_redis: Redis | None = None
+
+
+async def init_redis() -> Redis | None:
+    """Connect to Redis if configured. A failed ping leaves Redis disabled."""
+    global _redis
+    if not settings.REDIS_URL:
+        return None
+
+    client = Redis.from_url(
+        settings.REDIS_URL,
+        socket_connect_timeout=1.0,
+        socket_timeout=0.5,
+        health_check_interval=30,
+    )
+    try:
+        await client.ping()
+    except Exception as e:
+        print(f"⚠️ Redis unavailable, using in-process fallbacks: {e}")
+        await client.aclose()
+        return None
+
+    _redis = client
+    return _redis
+
+
+def get_redis() -> Redis | None:
+    """Return the shared Redis client, or None when running without Redis."""
+    return _redis
+
+
+async def close_redis() -> None:
+    global _redis
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
@@ -8,7 +8,12 @@ from aiogram import Bot, Dispatcher
 from aiogram.types import Update
 
 from app.core.config import get_settings
-from app.routers import auth, food, gamification, subscription, weight, workouts
+from app.core.http import close_http_client, init_http_client
+from app.core.redis import close_redis, init_redis
+from app.routers import auth, dashboard, food, gamification, subscription, weight, workouts
+from app.services import ai_service, food_service, image_service
+from app.services.food_catalog import get_food_index
+from app.services.photo_jobs import photo_jobs
 
 settings = get_settings()
 
@@ -66,7 +71,15 @@ _register_handlers()
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print(f"🚀 NutriBot API starting... Bot configured: {_bot is not None}")
+    print(f"🔎 Food index ready: {len(get_food_index())} products")
+    await init_http_client()
+    await init_redis()
+    photo_jobs.start()
     yield
+    await photo_jobs.stop()
+    image_service.close_pool()
+    await close_redis()
+    await close_http_client()
     print("👋 NutriBot API shutting down...")
 
 
@@ -97,6 +110,7 @@ app.include_router(workouts.router, prefix=settings.API_V1_PREFIX)
 app.include_router(gamification.router, prefix=settings.API_V1_PREFIX)
 app.include_router(subscription.router, prefix=settings.API_V1_PREFIX)
 app.include_router(weight.router, prefix=settings.API_V1_PREFIX)
+app.include_router(dashboard.router, prefix=settings.API_V1_PREFIX)
 
 
 @app.get("/")
@@ -116,6 +130,32 @@ async def health():
     }
 
 
+@app.get("/metrics")
+async def metrics():
+    """In-process counters for caches and outbound integrations."""
+    return {
+        "food_search_cache": food_service.search_cache.stats.as_dict(),
+        "food_barcode_cache": food_service.barcode_cache.stats.as_dict(),
+        "photo_jobs": photo_jobs.stats.as_dict(),
+        "photo_analysis_cache": ai_service.photo_cache.stats.as_dict(),
+        "circuit_breakers": {
+            breaker.name: breaker.as_dict()
+            for breaker in (food_service.off_breaker, ai_service.openai_breaker)
+        },
+        "rate_limits": {
+            limiter.name: limiter.stats.as_dict() for limiter in (food.photo_rate_limit,)
+        },
+        "single_flight": {
+            flight.name: flight.stats.as_dict()
+            for flight in (
+                food_service.search_flight,
+                food_service.barcode_flight,
+                ai_service.photo_flight,
+            )
+        },
+    }
+
+
 @app.post(f"{settings.API_V1_PREFIX}/bot/webhook")
 async def bot_webhook(request: Request):
     """Receive Telegram updates via webhook."""
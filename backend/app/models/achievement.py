@@ -37,3 +37,7 @@ ACHIEVEMENT_DEFINITIONS = {
     "goal_reached": {"name": "Цель достигнута", "description": "Достиг целевого веса", "icon": "🎯", "xp": 500},
     "level_10": {"name": "Про", "description": "Достиг 10 уровня", "icon": "⭐", "xp": 300},
 }
+
+# Bit per achievement in User.achievements_mask, in definition order.
+# Append new achievements at the end; never reorder or remove entries.
+ACHIEVEMENT_BITS = {code: 1 << index for index, code in enumerate(ACHIEVEMENT_DEFINITIONS)}
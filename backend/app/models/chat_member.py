@@ -0,0 +1,21 @@
+"""ChatMember model — users seen opening the Mini App from a Telegram chat."""
+
+from sqlalchemy import Column, DateTime, ForeignKey, Index, String, func
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.models.base import Base
+
+
+class ChatMember(Base):
+    """
+    Recorded at login from the signed initData `chat_instance`, so chat
+    leaderboards only ever show people who shared that chat with the caller.
+    """
+
+    __tablename__ = "chat_members"
+
+    chat_instance = Column(String(64), primary_key=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    seen_at = Column(DateTime, nullable=False, server_default=func.now())
+
+    __table_args__ = (Index("ix_chat_members_chat_seen", "chat_instance", "seen_at"),)
@@ -0,0 +1,27 @@
+"""DailyNutrition model — per-user, per-day КБЖУ rollup of food_log."""
+
+from sqlalchemy import Column, Date, DateTime, Float, ForeignKey, Integer, func
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.models.base import Base
+
+# Bit per meal type in DailyNutrition.meal_mask
+MEAL_BITS = {"breakfast": 1, "lunch": 2, "dinner": 4, "snack": 8}
+
+
+class DailyNutrition(Base):
+    """Maintained in the same transaction as every food_log write."""
+
+    __tablename__ = "daily_nutrition"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+
+    calories = Column(Float, nullable=False, default=0)
+    protein_g = Column(Float, nullable=False, default=0)
+    fat_g = Column(Float, nullable=False, default=0)
+    carbs_g = Column(Float, nullable=False, default=0)
+    entry_count = Column(Integer, nullable=False, default=0)
+    meal_mask = Column(Integer, nullable=False, default=0)  # OR of MEAL_BITS
+
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
@@ -2,7 +2,7 @@
 
 import uuid
 
-from sqlalchemy import Column, DateTime, Float, ForeignKey, String, Text, func
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Index, String, Text, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
@@ -33,5 +33,11 @@ class FoodLog(Base):
 
     created_at = Column(DateTime, server_default=func.now())
 
+    __table_args__ = (
+        # Day views use half-open logged_at ranges; /food/recent orders by created_at
+        Index("ix_food_log_user_logged_at", "user_id", "logged_at"),
+        Index("ix_food_log_user_created_at", "user_id", created_at.desc()),
+    )
+
     # Relationships
     user = relationship("User", back_populates="food_logs")
@@ -0,0 +1,50 @@
+"""Product model — offline Open Food Facts catalog with trigram search."""
+
+from sqlalchemy import BigInteger, Column, DateTime, Float, Index, String, Text, func
+
+from app.models.base import Base
+
+
+class Product(Base):
+    __tablename__ = "products"
+
+    code = Column(String(32), primary_key=True)  # barcode
+    name = Column(String(300), nullable=False)
+    name_normalized = Column(String(300), nullable=False)  # lowercase, ё → е
+    brand = Column(String(200))
+
+    # КБЖУ per 100 g
+    calories = Column(Float, nullable=False)
+    protein = Column(Float, default=0)
+    fat = Column(Float, default=0)
+    carbs = Column(Float, default=0)
+
+    source = Column(String(20), default="off_dump")  # off_dump | off_api
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        # Requires the pg_trgm extension; serves LIKE '%q%' and similarity()
+        Index(
+            "ix_products_name_trgm",
+            "name_normalized",
+            postgresql_using="gin",
+            postgresql_ops={"name_normalized": "gin_trgm_ops"},
+        ),
+        # Serves LIKE 'q%' for queries too short for trigrams
+        Index(
+            "ix_products_name_prefix",
+            "name_normalized",
+            postgresql_ops={"name_normalized": "text_pattern_ops"},
+        ),
+    )
+
+
+class ProductImport(Base):
+    """Resume checkpoint for a dump import, committed with each batch."""
+
+    __tablename__ = "product_imports"
+
+    source = Column(Text, primary_key=True)  # dump file name
+    records_done = Column(BigInteger, nullable=False, default=0)
+    rows_loaded = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
@@ -40,6 +40,19 @@ class User(Base):
     streak_days = Column(Integer, default=0)
     max_streak_days = Column(Integer, default=0)
     last_streak_date = Column(Date)
+    # Earned achievements (ACHIEVEMENT_BITS) and running counters for achievement rules;
+    # the achievements table remains the record of achieved_at
+    achievements_mask = Column(BigInteger, nullable=False, default=0, server_default="0")
+    workouts_completed = Column(Integer, nullable=False, default=0, server_default="0")
+    photos_analyzed = Column(Integer, nullable=False, default=0, server_default="0")
+    logging_days = Column(Integer, nullable=False, default=0, server_default="0")
+    # Consecutive completed workout days ending at last_workout_date (not decayed; readers
+    # treat it as 0 once last_workout_date is before yesterday)
+    current_workout_streak = Column(Integer, nullable=False, default=0, server_default="0")
+    best_workout_streak = Column(Integer, nullable=False, default=0, server_default="0")
+    last_workout_date = Column(Date)
+    # Bumped in the same transaction as any change the app shows back to the user (ETags)
+    data_version = Column(BigInteger, nullable=False, default=0, server_default="0")
 
     # Subscription
     trial_started_at = Column(DateTime)
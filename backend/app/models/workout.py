@@ -2,7 +2,7 @@
 
 import uuid
 
-from sqlalchemy import Boolean, Column, Date, DateTime, ForeignKey, Integer, Text, UniqueConstraint, func
+from sqlalchemy import Boolean, Column, Date, DateTime, ForeignKey, Index, Integer, Text, UniqueConstraint, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
@@ -23,8 +23,17 @@ class Workout(Base):
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
 
-    # One workout per day per user
-    __table_args__ = (UniqueConstraint("user_id", "workout_date", name="uq_user_workout_date"),)
+    __table_args__ = (
+        # One workout per day per user
+        UniqueConstraint("user_id", "workout_date", name="uq_user_workout_date"),
+        # Stats and achievements only look at completed workouts
+        Index(
+            "ix_workouts_user_completed_date",
+            "user_id",
+            "workout_date",
+            postgresql_where=completed.is_(True),
+        ),
+    )
 
     # Relationships
     user = relationship("User", back_populates="workouts")
@@ -4,13 +4,16 @@ from datetime import datetime, timedelta, timezone
 
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
-from sqlalchemy import select
+from sqlalchemy import case, func, or_
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.auth import create_access_token, get_current_user_id, validate_telegram_init_data
+from app.core.auth import issue_login_token, validate_telegram_init_data
 from app.core.database import get_db
+from app.models.chat_member import ChatMember
 from app.models.user import User
 from app.services.subscription_service import start_trial
+from app.services.user_service import bump_data_version, data_version_changed, get_cached_user, get_current_user, invalidate_user
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -69,27 +72,57 @@ def calculate_daily_norms(
 @router.post("/telegram")
 async def auth_telegram(body: TelegramAuthRequest, db: AsyncSession = Depends(get_db)):
     """Authenticate via Telegram initData. Creates user if not exists."""
-    user_data = validate_telegram_init_data(body.initData)
+    init_data = validate_telegram_init_data(body.initData)
+    user_data = init_data["user"]
+    chat_instance = init_data.get("chat_instance")
 
     tg_id = user_data.get("id")
     if not tg_id:
         raise HTTPException(status_code=400, detail="Missing Telegram user ID")
 
-    # Find or create user
-    result = await db.execute(select(User).where(User.tg_id == tg_id))
-    user = result.scalar_one_or_none()
-
-    if not user:
-        user = User(
-            tg_id=tg_id,
-            username=user_data.get("username", ""),
-            first_name=user_data.get("first_name", ""),
+    # Find or create user in one round trip; concurrent first logins both land on the same row
+    stmt = insert(User).values(
+        tg_id=tg_id,
+        username=user_data.get("username", ""),
+        first_name=user_data.get("first_name", ""),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[User.tg_id],
+        set_={
+            "username": stmt.excluded.username,
+            "first_name": stmt.excluded.first_name,
+            # A renamed Telegram account changes what /me shows
+            "data_version": case(
+                (
+                    or_(
+                        User.username.is_distinct_from(stmt.excluded.username),
+                        User.first_name.is_distinct_from(stmt.excluded.first_name),
+                    ),
+                    User.data_version + 1,
+                ),
+                else_=User.data_version,
+            ),
+        },
+    ).returning(User)
+    result = await db.execute(stmt, execution_options={"populate_existing": True})
+    user = result.scalar_one()
+    invalidate_user(db, user.id)
+    data_version_changed(db, user.id, user.data_version)
+
+    # Opened from a chat: remember the membership for chat leaderboards
+    claims = {"sub": str(user.id), "tg_id": tg_id}
+    if chat_instance:
+        member = insert(ChatMember).values(chat_instance=chat_instance, user_id=user.id)
+        await db.execute(
+            member.on_conflict_do_update(
+                index_elements=[ChatMember.chat_instance, ChatMember.user_id],
+                set_={"seen_at": func.now()},
+            )
         )
-        db.add(user)
-        await db.flush()
+        claims["chat"] = chat_instance
 
-    # Create JWT
-    token = create_access_token({"sub": str(user.id), "tg_id": tg_id})
+    # Create JWT (or hand back the one this initData already got)
+    token = issue_login_token(init_data, claims)
 
     return {
         "access_token": token,
@@ -116,14 +149,11 @@ async def auth_telegram(body: TelegramAuthRequest, db: AsyncSession = Depends(ge
 @router.post("/onboarding")
 async def complete_onboarding(
     body: OnboardingRequest,
-    user_id: str = Depends(get_current_user_id),
+    user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """Complete onboarding wizard — set body params and calculate КБЖУ."""
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    await bump_data_version(db, user.id)
 
     # Set body params
     user.goal = body.goal
@@ -166,14 +196,11 @@ class ProfileUpdateRequest(BaseModel):
 @router.put("/profile")
 async def update_profile(
     body: ProfileUpdateRequest,
-    user_id: str = Depends(get_current_user_id),
+    user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """Update user body parameters and recalculate daily КБЖУ norms."""
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    await bump_data_version(db, user.id)
 
     user.goal = body.goal
     user.gender = body.gender
@@ -195,16 +222,8 @@ async def update_profile(
 
 
 @router.get("/me")
-async def get_me(
-    user_id: str = Depends(get_current_user_id),
-    db: AsyncSession = Depends(get_db),
-):
+async def get_me(user: User = Depends(get_cached_user)):
     """Get current user profile."""
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
     return {
         "id": str(user.id),
         "tg_id": user.tg_id,
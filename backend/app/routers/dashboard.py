@@ -0,0 +1,44 @@
+"""Dashboard router — everything the Mini App home screen needs in one response."""
+
+import asyncio
+
+from fastapi import APIRouter, Depends, Query
+
+from app.core.database import async_session_factory
+from app.models.user import User
+from app.routers import auth, food, gamification, workouts
+from app.services.subscription_service import get_subscription_status
+from app.services.user_service import get_versioned_user
+
+router = APIRouter(prefix="/dashboard", tags=["dashboard"])
+
+
+async def _in_session(endpoint, **kwargs):
+    """Run a read-only endpoint on its own pooled connection (sessions are not concurrency-safe)."""
+    async with async_session_factory() as db:
+        return await endpoint(db=db, **kwargs)
+
+
+@router.get("")
+async def get_dashboard(
+    date: str = Query(default=None, description="Food log date in YYYY-MM-DD format"),
+    user: User = Depends(get_versioned_user),
+):
+    """
+    /auth/me, /food/log, /gamification/profile, /subscription/status and
+    /workouts/stats in one response. The user is authenticated and loaded
+    once; the three database-backed parts run concurrently. Unchanged data
+    is answered with 304 from the user's data version.
+    """
+    food_log, profile, workout_stats = await asyncio.gather(
+        _in_session(food.get_food_log, date=date, user=user),
+        _in_session(gamification.get_gamification_profile, user=user),
+        _in_session(workouts.get_workout_stats, user_id=user.id),
+    )
+    return {
+        "me": await auth.get_me(user),
+        "food_log": food_log,
+        "gamification": profile,
+        "subscription": get_subscription_status(user),
+        "workout_stats": workout_stats,
+    }
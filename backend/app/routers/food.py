@@ -2,21 +2,34 @@
 
 from datetime import date, datetime, timedelta
 
-from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Response, UploadFile
+from pydantic import BaseModel, Field
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.auth import get_current_user_id
+from app.core.config import get_settings
 from app.core.database import get_db
+from app.models.daily_nutrition import DailyNutrition
 from app.models.food_log import FoodLog
 from app.models.user import User
-from app.services import ai_service, food_service
-from app.services.gamification_service import award_xp, check_and_award_achievement, check_daily_meals_bonus, update_streak
+from app.services import ai_service, food_service, image_service, nutrition_service
+from app.services.gamification_service import FOOD_LOGGED, GamificationEvent, process_event
+from app.services.image_service import InvalidImageError
+from app.services.photo_jobs import PhotoJob, QueueFullError, photo_jobs, reward_analysis
+from app.services.rate_limit import RateLimiter
 from app.services.subscription_service import has_premium_access
+from app.services.user_service import bump_data_version, get_cached_user, get_current_user, get_versioned_user
+
+settings = get_settings()
 
 router = APIRouter(prefix="/food", tags=["food"])
 
+PHOTO_QUEUE_RETRY_AFTER = 5  # seconds
+
+# Spec: at most 10 AI requests per hour per user; tiers in AI_PHOTO_RATE_LIMITS
+photo_rate_limit = RateLimiter("ai_photo", settings.AI_PHOTO_RATE_LIMITS)
+
 
 class FoodLogCreate(BaseModel):
     food_name: str
@@ -46,31 +59,27 @@ MEAL_XP = {"breakfast": 15, "lunch": 15, "dinner": 15, "snack": 10}
 @router.get("/log")
 async def get_food_log(
     date: str = Query(default=None, description="Date in YYYY-MM-DD format"),
-    user_id: str = Depends(get_current_user_id),
+    user: User = Depends(get_versioned_user),
     db: AsyncSession = Depends(get_db),
 ):
     """Get food log entries for a given date."""
+    user_id = user.id
     target_date = datetime.strptime(date, "%Y-%m-%d").date() if date else datetime.now().date()
+    day_start, day_end = nutrition_service.day_range(target_date)
 
     result = await db.execute(
         select(FoodLog)
         .where(
             FoodLog.user_id == user_id,
-            func.date(FoodLog.logged_at) == target_date,
+            FoodLog.logged_at >= day_start,
+            FoodLog.logged_at < day_end,
         )
         .order_by(FoodLog.logged_at)
     )
     entries = result.scalars().all()
 
-    # Calculate totals
-    totals = {"calories": 0, "protein_g": 0, "fat_g": 0, "carbs_g": 0}
-    entry_list = []
-    for e in entries:
-        totals["calories"] += e.calories
-        totals["protein_g"] += e.protein_g or 0
-        totals["fat_g"] += e.fat_g or 0
-        totals["carbs_g"] += e.carbs_g or 0
-        entry_list.append({
+    entry_list = [
+        {
             "id": str(e.id),
             "food_name": e.food_name,
             "calories": e.calories,
@@ -81,11 +90,20 @@ async def get_food_log(
             "meal_type": e.meal_type,
             "source": e.source,
             "logged_at": e.logged_at.isoformat() if e.logged_at else None,
-        })
+        }
+        for e in entries
+    ]
+
+    # Totals come from the daily_nutrition rollup
+    day = await nutrition_service.get_day(db, user_id, target_date)
+    totals = {
+        "calories": day.calories if day else 0,
+        "protein_g": day.protein_g if day else 0,
+        "fat_g": day.fat_g if day else 0,
+        "carbs_g": day.carbs_g if day else 0,
+    }
 
     # Get user goal macros
-    user_result = await db.execute(select(User).where(User.id == user_id))
-    user = user_result.scalar_one_or_none()
     goal = {
         "calories": user.daily_calories or 2000,
         "protein_g": user.daily_protein_g or 150,
@@ -99,14 +117,11 @@ async def get_food_log(
 @router.post("/log")
 async def create_food_log(
     body: FoodLogCreate,
-    user_id: str = Depends(get_current_user_id),
+    user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """Add a food log entry. Awards XP based on meal type."""
-    user_result = await db.execute(select(User).where(User.id == user_id))
-    user = user_result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    user_id = user.id
 
     entry = FoodLog(
         user_id=user_id,
@@ -121,16 +136,14 @@ async def create_food_log(
     )
     db.add(entry)
     await db.flush()
+    # logged_at defaults to now() server-side, so the rollup day is current_date
+    meal_mask = await nutrition_service.add_entry(db, user_id, func.current_date(), entry)
 
-    # Award XP
+    # XP, streak, all-meals bonus and achievements in one pass
     xp_amount = MEAL_XP.get(body.meal_type, 10)
-    xp_result = await award_xp(db, user, xp_amount)
-
-    # Update streak
-    streak_result = await update_streak(db, user)
-
-    # Check all-meals bonus
-    bonus = await check_daily_meals_bonus(db, user)
+    game = await process_event(
+        db, user, GamificationEvent(FOOD_LOGGED, xp=xp_amount, meal_mask=meal_mask)
+    )
 
     return {
         "entry": {
@@ -144,10 +157,12 @@ async def create_food_log(
             "meal_type": entry.meal_type,
             "source": entry.source,
         },
-        "xp_awarded": xp_result["xp_awarded"],
-        "level_up": xp_result.get("level_up", False),
-        "streak": streak_result,
-        "all_meals_bonus": bonus,
+        "xp_awarded": game["xp_awarded"],
+        "level": game["level"],
+        "level_up": game["level_up"],
+        "streak": game["streak"],
+        "all_meals_bonus": game["all_meals_bonus"],
+        "achievements": game["achievements"],
     }
 
 
@@ -166,8 +181,22 @@ async def update_food_log(
     if not entry:
         raise HTTPException(status_code=404, detail="Entry not found")
 
+    before = {field: getattr(entry, field) or 0 for field in nutrition_service.MACRO_FIELDS}
+    old_meal_type = entry.meal_type
+
     for field, value in body.model_dump(exclude_unset=True).items():
         setattr(entry, field, value)
+    await db.flush()
+
+    if entry.logged_at:
+        await nutrition_service.apply_delta(
+            db,
+            user_id,
+            entry.logged_at.date(),
+            {field: (getattr(entry, field) or 0) - before[field] for field in before},
+            recompute_mask=entry.meal_type != old_meal_type,
+        )
+    await bump_data_version(db, user_id)
 
     return {"entry": {"id": str(entry.id), "food_name": entry.food_name}}
 
@@ -187,46 +216,158 @@ async def delete_food_log(
         raise HTTPException(status_code=404, detail="Entry not found")
 
     await db.delete(entry)
+    await db.flush()
+
+    if entry.logged_at:
+        await nutrition_service.apply_delta(
+            db,
+            user_id,
+            entry.logged_at.date(),
+            {field: -(getattr(entry, field) or 0) for field in nutrition_service.MACRO_FIELDS},
+            count_delta=-1,
+            recompute_mask=True,
+        )
+    await bump_data_version(db, user_id)
     return {"deleted": True}
 
 
+async def require_premium(user: User = Depends(get_cached_user)) -> User:
+    if not has_premium_access(user):
+        raise HTTPException(status_code=403, detail="Premium subscription required")
+    return user
+
+
+async def _submit_photo(photo: UploadFile, user: User, response: Response) -> PhotoJob:
+    """Validate, charge the rate limit, then answer from cache or queue. Rejected uploads cost no token."""
+    image_bytes = await photo.read()
+    if len(image_bytes) > settings.PHOTO_MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail="Photo is too large")
+
+    try:
+        image_bytes, mime_type, phash = await image_service.prepare_photo(image_bytes)
+    except InvalidImageError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Same or near-duplicate photo analyzed before: answered even while OpenAI is down
+    cached = ai_service.cached_analysis(image_bytes, phash)
+    if cached is None and ai_service.openai_breaker.rejecting():
+        raise HTTPException(
+            status_code=503,
+            detail="Photo analysis is temporarily unavailable",
+            headers={"Retry-After": str(max(1, round(ai_service.openai_breaker.retry_after())))},
+        )
+
+    await photo_rate_limit.charge(user, response)
+
+    if cached is not None:
+        await reward_analysis(user.id)
+        return await photo_jobs.finished(user.id, cached)
+
+    try:
+        return await photo_jobs.submit(user.id, image_bytes, mime_type, phash)
+    except QueueFullError:
+        # Charged above, but the job never ran
+        await photo_rate_limit.refund_user(user)
+        raise HTTPException(
+            status_code=429,
+            detail="Photo analysis is busy, try again shortly",
+            headers={"Retry-After": str(PHOTO_QUEUE_RETRY_AFTER)},
+        )
+
+
 @router.post("/analyze-photo")
 async def analyze_photo(
+    response: Response,
     photo: UploadFile = File(...),
-    user_id: str = Depends(get_current_user_id),
-    db: AsyncSession = Depends(get_db),
+    user: User = Depends(require_premium),
 ):
-    """AI food photo analysis (premium only)."""
-    user_result = await db.execute(select(User).where(User.id == user_id))
-    user = user_result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
-    if not has_premium_access(user):
-        raise HTTPException(status_code=403, detail="Premium subscription required")
+    """AI food photo analysis (premium only). Waits for the result; see /analyze-photo/jobs."""
+    job = await photo_jobs.wait(await _submit_photo(photo, user, response))
+
+    if job.status == "timeout":
+        raise HTTPException(status_code=504, detail=job.error)
+    if job.retry_after is not None:
+        # The breaker opened while the job waited: unavailable, not a bad upstream reply
+        raise HTTPException(
+            status_code=503,
+            detail=job.error,
+            headers={"Retry-After": str(max(1, round(job.retry_after)))},
+        )
+    if job.status != "done":
+        raise HTTPException(status_code=502, detail=job.error)
+    return job.result
 
-    image_bytes = await photo.read()
-    mime_type = photo.content_type or "image/jpeg"
 
-    result = await ai_service.analyze_food_photo(image_bytes, mime_type)
+@router.post("/analyze-photo/jobs", status_code=202)
+async def submit_photo_job(
+    response: Response,
+    photo: UploadFile = File(...),
+    user: User = Depends(require_premium),
+):
+    """Queue a photo for AI analysis (premium only). Poll the returned job id for the result."""
+    job = await _submit_photo(photo, user, response)
+    return job.as_dict()
 
-    # Award XP for AI photo analysis
-    await award_xp(db, user, 15)
-    await check_and_award_achievement(db, user, "first_photo")
 
-    return result
+@router.get("/analyze-photo/jobs/{job_id}")
+async def get_photo_job(
+    job_id: str,
+    user_id: str = Depends(get_current_user_id),
+):
+    """Status of a photo analysis job; `result` is present once status is "done"."""
+    job = await photo_jobs.get(job_id, user_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.as_dict()
 
 
 @router.get("/search")
 async def search_food(
     q: str = Query(..., min_length=2),
     limit: int = Query(default=20, le=50),
+    db: AsyncSession = Depends(get_db),
 ):
     """Search for food products."""
-    results = await food_service.search_food(q, limit)
+    results = await food_service.search_food(q, limit, db)
     return {"results": results}
 
 
+class BarcodeBatchRequest(BaseModel):
+    codes: list[str] = Field(..., min_length=1, max_length=100)
+
+
+@router.get("/barcode/{code}")
+async def get_food_by_barcode(
+    code: str,
+    user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
+):
+    """Look up a product by barcode."""
+    if not food_service.is_valid_barcode(code):
+        raise HTTPException(status_code=400, detail="Invalid barcode")
+
+    results = await food_service.lookup_barcodes(db, [code])
+    product = results[code]
+    if product is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return {"product": product}
+
+
+@router.post("/barcode/batch")
+async def get_foods_by_barcodes(
+    body: BarcodeBatchRequest,
+    user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
+):
+    """Look up many barcodes in one call. Unknown codes map to null."""
+    invalid = [code for code in body.codes if not food_service.is_valid_barcode(code)]
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Invalid barcodes: {', '.join(invalid[:10])}")
+
+    results = await food_service.lookup_barcodes(db, body.codes)
+    return {"products": results}
+
+
 @router.get("/recent")
 async def get_recent_foods(
     user_id: str = Depends(get_current_user_id),
@@ -262,12 +403,11 @@ async def get_recent_foods(
 @router.get("/stats")
 async def get_food_stats(
     period: str = Query(default="7d", description="7d or 30d"),
-    user_id: str = Depends(get_current_user_id),
+    user: User = Depends(get_cached_user),
     db: AsyncSession = Depends(get_db),
 ):
     """Get nutrition stats for a period."""
-    user_result = await db.execute(select(User).where(User.id == user_id))
-    user = user_result.scalar_one_or_none()
+    user_id = user.id
 
     # Check premium for 30d+
     if period != "7d" and not has_premium_access(user):
@@ -277,21 +417,14 @@ async def get_food_stats(
     start_date = date.today() - timedelta(days=days)
 
     result = await db.execute(
-        select(
-            func.date(FoodLog.logged_at).label("day"),
-            func.sum(FoodLog.calories).label("calories"),
-            func.sum(FoodLog.protein_g).label("protein_g"),
-            func.sum(FoodLog.fat_g).label("fat_g"),
-            func.sum(FoodLog.carbs_g).label("carbs_g"),
-        )
+        select(DailyNutrition)
         .where(
-            FoodLog.user_id == user_id,
-            func.date(FoodLog.logged_at) >= start_date,
+            DailyNutrition.user_id == user_id,
+            DailyNutrition.day >= start_date,
         )
-        .group_by(func.date(FoodLog.logged_at))
-        .order_by(func.date(FoodLog.logged_at))
+        .order_by(DailyNutrition.day)
     )
-    rows = result.all()
+    rows = result.scalars().all()
 
     daily = [
         {
@@ -1,34 +1,48 @@
-"""Gamification router — profile, achievements, daily bonus."""
+"""Gamification router — profile, achievements, daily bonus, leaderboards."""
 
+import hashlib
+import json
+import uuid
 from datetime import date, datetime, timezone
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.auth import get_current_user_id
+from app.core.auth import get_current_chat_instance, get_current_user_id
+from app.core.config import get_settings
 from app.core.database import get_db
 from app.models.achievement import ACHIEVEMENT_DEFINITIONS, Achievement
+from app.models.chat_member import ChatMember
 from app.models.user import User
-from app.services.gamification_service import award_xp
+from app.services import leaderboard_service
+from app.services.gamification_service import DAILY_BONUS, GamificationEvent, process_event
+from app.services.user_service import etag_matches, get_current_user, get_versioned_user
 
 router = APIRouter(prefix="/gamification", tags=["gamification"])
+settings = get_settings()
+
+DAILY_BONUS_XP = 10
+
+# Definitions only change with a deploy
+ACHIEVEMENT_DEFINITIONS_BODY = json.dumps(
+    [{"code": code, **definition} for code, definition in ACHIEVEMENT_DEFINITIONS.items()],
+    ensure_ascii=False,
+    separators=(",", ":"),
+).encode()
+ACHIEVEMENT_DEFINITIONS_ETAG = f'"{hashlib.sha256(ACHIEVEMENT_DEFINITIONS_BODY).hexdigest()[:16]}"'
+STATIC_CACHE_CONTROL = "public, max-age=86400, stale-while-revalidate=604800"
 
 
 @router.get("/profile")
 async def get_gamification_profile(
-    user_id: str = Depends(get_current_user_id),
+    user: User = Depends(get_versioned_user),
     db: AsyncSession = Depends(get_db),
 ):
     """Get gamification profile: level, XP, streak, achievements."""
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
     # Get achievements
     ach_result = await db.execute(
-        select(Achievement).where(Achievement.user_id == user_id)
+        select(Achievement).where(Achievement.user_id == user.id)
     )
     achievements = ach_result.scalars().all()
     earned_codes = {a.achievement_code for a in achievements}
@@ -59,12 +73,12 @@ async def get_gamification_profile(
 
 @router.get("/achievements")
 async def get_achievements(
-    user_id: str = Depends(get_current_user_id),
+    user: User = Depends(get_versioned_user),
     db: AsyncSession = Depends(get_db),
 ):
     """Get all achievements with earned/available status."""
     ach_result = await db.execute(
-        select(Achievement).where(Achievement.user_id == user_id)
+        select(Achievement).where(Achievement.user_id == user.id)
     )
     achievements = ach_result.scalars().all()
     earned_codes = {a.achievement_code: a for a in achievements}
@@ -87,17 +101,21 @@ async def get_achievements(
     return {"earned": earned, "available": available}
 
 
+@router.get("/achievements/definitions")
+async def get_achievement_definitions(request: Request):
+    """All achievement definitions; the same for every user, cacheable by browsers and CDNs."""
+    headers = {"ETag": ACHIEVEMENT_DEFINITIONS_ETAG, "Cache-Control": STATIC_CACHE_CONTROL}
+    if etag_matches(request, ACHIEVEMENT_DEFINITIONS_ETAG):
+        return Response(status_code=304, headers=headers)
+    return Response(content=ACHIEVEMENT_DEFINITIONS_BODY, media_type="application/json", headers=headers)
+
+
 @router.post("/daily-bonus")
 async def claim_daily_bonus(
-    user_id: str = Depends(get_current_user_id),
+    user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """Claim daily login bonus (+10 XP). One claim per day."""
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
     today = date.today()
 
     # Check if already claimed today (using last_active_at date)
@@ -106,10 +124,102 @@ async def claim_daily_bonus(
 
     # Award daily bonus
     user.last_active_at = datetime.now(timezone.utc)
-    xp_result = await award_xp(db, user, 10)
+    game = await process_event(db, user, GamificationEvent(DAILY_BONUS, xp=DAILY_BONUS_XP))
 
     return {
-        "xp_awarded": 10,
+        "xp_awarded": game["xp_awarded"],
         "already_claimed": False,
-        "level_up": xp_result.get("level_up", False),
+        "level_up": game["level_up"],
+    }
+
+
+def _check_board(board: str) -> None:
+    if board not in leaderboard_service.BOARDS:
+        raise HTTPException(status_code=404, detail="Unknown leaderboard")
+
+
+async def _user_names(db: AsyncSession, user_ids: list[str]) -> dict[str, dict]:
+    if not user_ids:
+        return {}
+    result = await db.execute(
+        select(User.id, User.first_name, User.username, User.level)
+        .where(User.id.in_([uuid.UUID(user_id) for user_id in user_ids]))
+    )
+    return {
+        str(row.id): {"first_name": row.first_name, "username": row.username, "level": row.level}
+        for row in result.all()
+    }
+
+
+@router.get("/leaderboard/{board}")
+async def get_leaderboard(
+    board: str,
+    cursor: str | None = Query(default=None, description="next_cursor of the previous page"),
+    limit: int = Query(default=settings.LEADERBOARD_PAGE_SIZE, ge=1, le=100),
+    user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
+):
+    """Global leaderboard page (xp, streak or workouts_week) plus the caller's own rank."""
+    _check_board(board)
+    if cursor is not None and not cursor.isdigit():
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    offset = int(cursor or 0)
+
+    page = await leaderboard_service.get_page(db, board, offset, limit)
+    me = (await leaderboard_service.get_ranks(db, board, [str(user_id)]))[str(user_id)]
+    names = await _user_names(db, [member for _, member, _ in page])
+
+    return {
+        "board": board,
+        "entries": [
+            {"rank": rank, "user_id": member, "score": int(score), **names.get(member, {})}
+            for rank, member, score in page
+        ],
+        "me": {"rank": me[0], "score": int(me[1])} if me else None,
+        "next_cursor": str(offset + limit) if len(page) == limit else None,
+    }
+
+
+@router.get("/leaderboard/{board}/chat")
+async def get_chat_leaderboard(
+    board: str,
+    user_id: str = Depends(get_current_user_id),
+    chat_instance: str | None = Depends(get_current_chat_instance),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Leaderboard among users who opened the Mini App from the same Telegram
+    chat as the caller. Membership comes from signed initData only, so it
+    cannot be used to probe arbitrary Telegram accounts.
+    """
+    _check_board(board)
+    if not chat_instance:
+        raise HTTPException(status_code=404, detail="Open the app from a chat to see its leaderboard")
+
+    result = await db.execute(
+        select(ChatMember.user_id)
+        .where(ChatMember.chat_instance == chat_instance)
+        .order_by(ChatMember.seen_at.desc())
+        .limit(settings.LEADERBOARD_GROUP_MAX_MEMBERS)
+    )
+    member_ids = {str(member_id) for member_id in result.scalars().all()}
+    member_ids.add(str(user_id))
+
+    ranks = await leaderboard_service.get_ranks(db, board, sorted(member_ids))
+    # Ordering by global rank keeps ties in the board's own order
+    ranked = sorted(((member, *hit) for member, hit in ranks.items() if hit), key=lambda item: item[1])
+    names = await _user_names(db, [member for member, _, _ in ranked])
+
+    return {
+        "board": board,
+        "entries": [
+            {
+                "rank": index + 1,
+                "global_rank": global_rank,
+                "user_id": member,
+                "score": int(score),
+                **names.get(member, {}),
+            }
+            for index, (member, global_rank, score) in enumerate(ranked)
+        ],
     }
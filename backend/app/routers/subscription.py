@@ -8,21 +8,14 @@ from app.core.auth import get_current_user_id
 from app.core.database import get_db
 from app.models.user import User
 from app.services.subscription_service import activate_subscription, get_subscription_status
+from app.services.user_service import get_cached_user
 
 router = APIRouter(prefix="/subscription", tags=["subscription"])
 
 
 @router.get("/status")
-async def subscription_status(
-    user_id: str = Depends(get_current_user_id),
-    db: AsyncSession = Depends(get_db),
-):
+async def subscription_status(user: User = Depends(get_cached_user)):
     """Get current subscription status."""
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
     return get_subscription_status(user)
 
 
@@ -5,17 +5,20 @@ from datetime import date, timedelta
 from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.auth import get_current_user_id
 from app.core.database import get_db
 from app.models.user import User
 from app.models.weight_log import WeightLog
-from app.services.gamification_service import award_xp, check_and_award_achievement
+from app.services.gamification_service import WEIGHT_LOGGED, GamificationEvent, process_event
 from app.services.subscription_service import has_premium_access
+from app.services.user_service import get_current_user, get_versioned_user
 
 router = APIRouter(prefix="/weight", tags=["weight"])
 
+WEIGHT_LOG_XP = 10
+
 
 class WeightLogCreate(BaseModel):
     weight_kg: float
@@ -25,46 +28,29 @@ class WeightLogCreate(BaseModel):
 @router.post("/log")
 async def log_weight(
     body: WeightLogCreate,
-    user_id: str = Depends(get_current_user_id),
+    user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """Log weight for a date. Awards +10 XP."""
-    user_result = await db.execute(select(User).where(User.id == user_id))
-    user = user_result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
+    user_id = user.id
     logged_date = date.fromisoformat(body.logged_date) if body.logged_date else date.today()
 
-    # Upsert: check if entry exists for this date
+    # Upsert: one entry per user per date
+    stmt = insert(WeightLog).values(
+        user_id=user_id,
+        weight_kg=body.weight_kg,
+        logged_date=logged_date,
+    )
     result = await db.execute(
-        select(WeightLog).where(
-            WeightLog.user_id == user_id,
-            WeightLog.logged_date == logged_date,
-        )
+        stmt.on_conflict_do_update(
+            index_elements=[WeightLog.user_id, WeightLog.logged_date],
+            set_={"weight_kg": stmt.excluded.weight_kg},
+        ).returning(WeightLog.id, WeightLog.weight_kg, WeightLog.logged_date)
     )
-    existing = result.scalar_one_or_none()
-
-    if existing:
-        existing.weight_kg = body.weight_kg
-        entry = existing
-    else:
-        entry = WeightLog(
-            user_id=user_id,
-            weight_kg=body.weight_kg,
-            logged_date=logged_date,
-        )
-        db.add(entry)
-
-    # Update current weight on user profile
-    user.weight_kg = body.weight_kg
-
-    # Check goal reached achievement
-    if user.target_weight_kg and abs(body.weight_kg - user.target_weight_kg) <= 0.5:
-        await check_and_award_achievement(db, user, "goal_reached")
+    entry = result.one()
 
-    # Award XP
-    xp_result = await award_xp(db, user, 10)
+    # Current weight on the profile, goal achievement and XP
+    game = await process_event(db, user, GamificationEvent(WEIGHT_LOGGED, xp=WEIGHT_LOG_XP, weight_kg=body.weight_kg))
 
     await db.flush()
 
@@ -74,19 +60,19 @@ async def log_weight(
             "weight_kg": entry.weight_kg,
             "logged_date": str(entry.logged_date),
         },
-        "xp_awarded": 10,
+        "xp_awarded": game["xp_awarded"],
+        "level_up": game["level_up"],
+        "achievements": game["achievements"],
     }
 
 
 @router.get("/history")
 async def get_weight_history(
     period: str = Query(default="30d", description="30d, 90d, or all"),
-    user_id: str = Depends(get_current_user_id),
+    user: User = Depends(get_versioned_user),
     db: AsyncSession = Depends(get_db),
 ):
     """Get weight history. 30d+ requires premium."""
-    user_result = await db.execute(select(User).where(User.id == user_id))
-    user = user_result.scalar_one_or_none()
 
     if period != "30d" and not has_premium_access(user):
         raise HTTPException(status_code=403, detail="Premium subscription required")
@@ -98,7 +84,7 @@ async def get_weight_history(
     result = await db.execute(
         select(WeightLog)
         .where(
-            WeightLog.user_id == user_id,
+            WeightLog.user_id == user.id,
             WeightLog.logged_date >= start_date,
         )
         .order_by(WeightLog.logged_date)
@@ -4,17 +4,22 @@ from datetime import date, timedelta
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
-from sqlalchemy import func, select
+from sqlalchemy import func, literal_column, select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 
 from app.core.auth import get_current_user_id
 from app.core.database import get_db
 from app.models.user import User
 from app.models.workout import Workout
-from app.services.gamification_service import award_xp, check_workout_achievements
+from app.services.gamification_service import WORKOUT_COMPLETED, GamificationEvent, adjust_workouts_completed, process_event, update_workout_streak
+from app.services.user_service import bump_data_version, get_current_user
 
 router = APIRouter(prefix="/workouts", tags=["workouts"])
 
+NEW_WORKOUT_XP = 40
+
 
 class WorkoutCreate(BaseModel):
     workout_date: str  # YYYY-MM-DD
@@ -77,48 +82,62 @@ async def get_workouts(
 @router.post("")
 async def create_workout(
     body: WorkoutCreate,
-    user_id: str = Depends(get_current_user_id),
+    user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """Create or update workout for a date."""
-    user_result = await db.execute(select(User).where(User.id == user_id))
-    user = user_result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
+    user_id = user.id
     workout_date = date.fromisoformat(body.workout_date)
 
-    # Check if workout already exists for this date
+    # Upsert: one workout per user per date. XP is only written on insert, and
+    # `xmax = 0` tells a fresh insert from an update of an existing row. A
+    # subquery in RETURNING sees the statement's snapshot, i.e. the row as it
+    # was before this update
+    previous = aliased(Workout)
+    was_completed = (
+        select(previous.completed)
+        .where(previous.user_id == user_id, previous.workout_date == workout_date)
+        .scalar_subquery()
+    )
+    stmt = insert(Workout).values(
+        user_id=user_id,
+        workout_date=workout_date,
+        completed=body.completed,
+        notes=body.notes,
+        xp_awarded=NEW_WORKOUT_XP if body.completed else 0,
+    )
     result = await db.execute(
-        select(Workout).where(
-            Workout.user_id == user_id,
-            Workout.workout_date == workout_date,
+        stmt.on_conflict_do_update(
+            constraint="uq_user_workout_date",
+            set_={
+                "completed": stmt.excluded.completed,
+                "notes": stmt.excluded.notes,
+                "updated_at": func.now(),
+            },
+        ).returning(
+            Workout.id,
+            Workout.workout_date,
+            Workout.completed,
+            Workout.notes,
+            literal_column("xmax = 0").label("inserted"),
+            was_completed.label("was_completed"),
         )
     )
-    existing = result.scalar_one_or_none()
+    workout = result.one()
 
-    xp_awarded = 0
-    if existing:
-        existing.completed = body.completed
-        existing.notes = body.notes
-        workout = existing
-    else:
-        workout = Workout(
-            user_id=user_id,
-            workout_date=workout_date,
-            completed=body.completed,
-            notes=body.notes,
+    # XP and workout count achievements for a new completed workout
+    game = None
+    if workout.inserted and body.completed:
+        game = await process_event(
+            db, user, GamificationEvent(WORKOUT_COMPLETED, xp=NEW_WORKOUT_XP, day=workout.workout_date)
         )
-        db.add(workout)
-
-        # Award XP for new completed workout
-        if body.completed:
-            xp_awarded = 40
-            xp_result = await award_xp(db, user, xp_awarded)
-            workout.xp_awarded = xp_awarded
-
-            # Check workout count achievements
-            await check_workout_achievements(db, user)
+    elif not workout.inserted and bool(workout.completed) != bool(workout.was_completed):
+        # Re-posting a date flips `completed` like PUT does; keep the counter in step
+        await adjust_workouts_completed(db, user_id, 1 if workout.completed else -1, workout.workout_date)
+    if workout.completed or not workout.inserted:
+        await update_workout_streak(db, user_id, workout.workout_date, workout.completed)
+    if game is None:
+        await bump_data_version(db, user_id)
 
     await db.flush()
 
@@ -129,7 +148,8 @@ async def create_workout(
             "completed": workout.completed,
             "notes": workout.notes,
         },
-        "xp_awarded": xp_awarded,
+        "xp_awarded": game["xp_awarded"] if game else 0,
+        "achievements": game["achievements"] if game else [],
     }
 
 
@@ -149,9 +169,15 @@ async def update_workout(
         raise HTTPException(status_code=404, detail="Workout not found")
 
     if body.completed is not None:
+        toggled = bool(body.completed) != bool(workout.completed)
         workout.completed = body.completed
+        if toggled:
+            await adjust_workouts_completed(db, user_id, 1 if body.completed else -1, workout.workout_date)
+            # Autoflush makes the new flag visible if the streak is recomputed from history
+            await update_workout_streak(db, user_id, workout.workout_date, body.completed)
     if body.notes is not None:
         workout.notes = body.notes[:300]  # Limit to 300 chars
+    await bump_data_version(db, user_id)
 
     return {
         "workout": {
@@ -171,47 +197,37 @@ async def get_workout_stats(
     """Get workout statistics."""
     today = date.today()
 
-    # Last 7 days
-    result_7 = await db.execute(
-        select(func.count(Workout.id)).where(
-            Workout.user_id == user_id,
-            Workout.completed == True,
-            Workout.workout_date >= today - timedelta(days=7),
+    # Counts scan at most 30 days of the partial index; streaks are kept on
+    # users by update_workout_streak, so the whole view is one round trip
+    recent = (
+        select(
+            func.count().filter(Workout.workout_date >= today - timedelta(days=7)).label("last_7"),
+            func.count().label("last_30"),
         )
-    )
-    last_7 = result_7.scalar() or 0
-
-    # Last 30 days
-    result_30 = await db.execute(
-        select(func.count(Workout.id)).where(
+        .where(
             Workout.user_id == user_id,
-            Workout.completed == True,
+            Workout.completed.is_(True),
             Workout.workout_date >= today - timedelta(days=30),
         )
+        .subquery()
     )
-    last_30 = result_30.scalar() or 0
-
-    # Best streak (consecutive completed days)
-    result_all = await db.execute(
-        select(Workout.workout_date)
-        .where(Workout.user_id == user_id, Workout.completed == True)
-        .order_by(Workout.workout_date)
+    result = await db.execute(
+        select(
+            recent.c.last_7,
+            recent.c.last_30,
+            User.current_workout_streak,
+            User.best_workout_streak,
+            User.last_workout_date,
+        ).where(User.id == user_id)
     )
-    dates = [row[0] for row in result_all.all()]
-
-    best_streak = 0
-    current_streak = 0
-    for i, d in enumerate(dates):
-        if i == 0:
-            current_streak = 1
-        elif (d - dates[i - 1]).days == 1:
-            current_streak += 1
-        else:
-            current_streak = 1
-        best_streak = max(best_streak, current_streak)
+    stats = result.one()
+
+    # A run is still alive if it reached yesterday
+    alive = stats.last_workout_date is not None and stats.last_workout_date >= today - timedelta(days=1)
 
     return {
-        "last_7_days": last_7,
-        "last_30_days": last_30,
-        "best_streak": best_streak,
+        "last_7_days": stats.last_7,
+        "last_30_days": stats.last_30,
+        "current_streak": stats.current_workout_streak if alive else 0,
+        "best_streak": stats.best_workout_streak,
     }
@@ -0,0 +1,49 @@
+"""Compile the food catalog into the memory-mapped binary format.
+
+Usage:
+    python -m app.scripts.build_food_catalog [--source products.json] [--output path]
+
+The source is a JSON array or JSON Lines file of objects with `name`,
+`calories`, `protein`, `fat` and `carbs`. Without --source the built-in
+LOCAL_FOOD_DB is compiled.
+"""
+
+import argparse
+import json
+import time
+
+from app.core.config import get_settings
+from app.services.food_catalog import compile_catalog
+
+
+def read_source(path: str) -> list[dict]:
+    """Read products from a JSON array or JSON Lines file."""
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    if text.lstrip().startswith("["):
+        items = json.loads(text)
+    else:
+        items = [json.loads(line) for line in text.splitlines() if line.strip()]
+    return [item for item in items if item.get("name")]
+
+
+def main():
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Compile the NutriBot food catalog")
+    parser.add_argument("--source", help="JSON or JSONL product list (default: LOCAL_FOOD_DB)")
+    parser.add_argument("--output", default=settings.FOOD_CATALOG_PATH)
+    args = parser.parse_args()
+
+    if args.source:
+        items = read_source(args.source)
+    else:
+        from app.services.food_service import LOCAL_FOOD_DB
+        items = LOCAL_FOOD_DB
+
+    started = time.perf_counter()
+    count = compile_catalog(items, args.output)
+    print(f"📦 Compiled {count} products into {args.output} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
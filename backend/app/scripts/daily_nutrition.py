@@ -0,0 +1,144 @@
+"""Backfill and verify the daily_nutrition rollup against food_log.
+
+Usage:
+    python -m app.scripts.daily_nutrition backfill [--user USER_ID]
+    python -m app.scripts.daily_nutrition check [--user USER_ID] [--fix]
+
+`backfill` rebuilds rollup rows from food_log (idempotent). `check` compares
+every rollup row with the food_log aggregate and reports drift; with --fix
+the affected users are backfilled.
+"""
+
+import argparse
+import asyncio
+
+from sqlalchemy import and_, delete, func, or_, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import async_session_factory
+from app.models.daily_nutrition import DailyNutrition
+from app.models.food_log import FoodLog
+from app.services.nutrition_service import MACRO_FIELDS, rollup_select
+
+# Float sums drift slightly between incremental and full aggregation
+TOLERANCE = 0.01
+
+
+async def backfill(db: AsyncSession, user_ids: list | None = None) -> int:
+    """Rebuild rollup rows from food_log. Returns the number of rows written."""
+    source = rollup_select()
+    if user_ids is not None:
+        source = source.where(FoodLog.user_id.in_(user_ids))
+    source = source.subquery()
+
+    columns = ["user_id", "day", *MACRO_FIELDS, "entry_count", "meal_mask"]
+    stmt = insert(DailyNutrition).from_select(columns, select(*(source.c[c] for c in columns)))
+    result = await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[DailyNutrition.user_id, DailyNutrition.day],
+            set_={
+                **{c: stmt.excluded[c] for c in columns[2:]},
+                "updated_at": func.now(),
+            },
+        )
+    )
+
+    # Drop rollup rows whose food_log entries are all gone
+    orphaned = delete(DailyNutrition).where(
+        ~select(FoodLog.id)
+        .where(
+            FoodLog.user_id == DailyNutrition.user_id,
+            FoodLog.logged_at >= DailyNutrition.day,
+            FoodLog.logged_at < DailyNutrition.day + 1,
+        )
+        .exists()
+    )
+    if user_ids is not None:
+        orphaned = orphaned.where(DailyNutrition.user_id.in_(user_ids))
+    await db.execute(orphaned)
+
+    return result.rowcount
+
+
+async def check(db: AsyncSession, user_ids: list | None = None) -> list[dict]:
+    """Return rollup rows that disagree with food_log (missing, extra or drifted)."""
+    truth = rollup_select()
+    if user_ids is not None:
+        truth = truth.where(FoodLog.user_id.in_(user_ids))
+    truth = truth.subquery()
+
+    rollup = select(DailyNutrition)
+    if user_ids is not None:
+        rollup = rollup.where(DailyNutrition.user_id.in_(user_ids))
+    rollup = rollup.subquery()
+
+    drift = [
+        func.abs(func.coalesce(truth.c[field], 0) - func.coalesce(rollup.c[field], 0)) > TOLERANCE
+        for field in MACRO_FIELDS
+    ]
+    query = (
+        select(
+            func.coalesce(truth.c.user_id, rollup.c.user_id).label("user_id"),
+            func.coalesce(truth.c.day, rollup.c.day).label("day"),
+            truth.c.entry_count.label("expected_entries"),
+            rollup.c.entry_count.label("rollup_entries"),
+            truth.c.calories.label("expected_calories"),
+            rollup.c.calories.label("rollup_calories"),
+        )
+        .select_from(
+            truth.outerjoin(
+                rollup,
+                and_(truth.c.user_id == rollup.c.user_id, truth.c.day == rollup.c.day),
+                full=True,
+            )
+        )
+        .where(
+            or_(
+                truth.c.user_id.is_(None),
+                rollup.c.user_id.is_(None),
+                truth.c.entry_count != rollup.c.entry_count,
+                truth.c.meal_mask != rollup.c.meal_mask,
+                *drift,
+            )
+        )
+        .order_by("user_id", "day")
+    )
+    result = await db.execute(query)
+    return [dict(row._mapping) for row in result.all()]
+
+
+async def run(command: str, user_id: str | None, fix: bool) -> None:
+    user_ids = [user_id] if user_id else None
+    async with async_session_factory() as db:
+        if command == "backfill":
+            written = await backfill(db, user_ids)
+            await db.commit()
+            print(f"✅ Backfilled {written} daily_nutrition rows")
+            return
+
+        mismatches = await check(db, user_ids)
+        for row in mismatches[:50]:
+            print(f"❌ {row}")
+        if len(mismatches) > 50:
+            print(f"... and {len(mismatches) - 50} more")
+        print(f"{'⚠️' if mismatches else '✅'} {len(mismatches)} mismatched daily_nutrition rows")
+
+        if mismatches and fix:
+            affected = sorted({row["user_id"] for row in mismatches}, key=str)
+            await backfill(db, affected)
+            await db.commit()
+            print(f"🔧 Rebuilt rollup for {len(affected)} users")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the daily_nutrition rollup")
+    parser.add_argument("command", choices=["backfill", "check"])
+    parser.add_argument("--user", help="Limit to one user id")
+    parser.add_argument("--fix", action="store_true", help="Backfill users that fail the check")
+    args = parser.parse_args()
+    asyncio.run(run(args.command, args.user, args.fix))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Verify and rebuild the achievement bitmask and gamification counters on users.
+
+Usage:
+    python -m app.scripts.gamification_repair check [--user USER_ID]
+    python -m app.scripts.gamification_repair repair [--user USER_ID]
+
+Expected values come from history: achievements_mask from the achievements
+table, workouts_completed and the workout streak columns from completed
+workouts and logging_days from distinct food_log days. Photo analyses are
+not stored, so photos_analyzed is only raised to the number of ai_photo
+food_log entries, never lowered.
+Cached profiles pick the repaired values up within USER_PROFILE_CACHE_TTL.
+"""
+
+import argparse
+import asyncio
+
+from sqlalchemy import BigInteger, case, func, literal, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import async_session_factory
+from app.models.achievement import ACHIEVEMENT_BITS, Achievement
+from app.models.food_log import FoodLog
+from app.models.user import User
+from app.models.workout import Workout
+from app.services.gamification_service import workout_streak_select
+
+COUNTERS = (
+    "achievements_mask", "workouts_completed", "photos_analyzed", "logging_days",
+    "current_workout_streak", "best_workout_streak", "last_workout_date",
+)
+
+
+def expected_select(user_ids: list | None = None):
+    """Per-user values the mask and counters should have, derived from history."""
+    bit = case(
+        *((Achievement.achievement_code == code, literal(value, BigInteger)) for code, value in ACHIEVEMENT_BITS.items()),
+        else_=literal(0, BigInteger),
+    )
+    masks = select(Achievement.user_id, func.bit_or(bit).label("n")).group_by(Achievement.user_id).subquery()
+    workouts = (
+        select(Workout.user_id, func.count().label("n"))
+        .where(Workout.completed.is_(True))
+        .group_by(Workout.user_id)
+        .subquery()
+    )
+    photos = (
+        select(FoodLog.user_id, func.count().label("n"))
+        .where(FoodLog.source == "ai_photo")
+        .group_by(FoodLog.user_id)
+        .subquery()
+    )
+    days = (
+        select(FoodLog.user_id, func.count(func.distinct(func.date(FoodLog.logged_at))).label("n"))
+        .group_by(FoodLog.user_id)
+        .subquery()
+    )
+    streaks = workout_streak_select(user_ids).subquery()
+
+    query = (
+        select(
+            User.id.label("user_id"),
+            func.coalesce(masks.c.n, 0).label("achievements_mask"),
+            func.coalesce(workouts.c.n, 0).label("workouts_completed"),
+            func.greatest(User.photos_analyzed, func.coalesce(photos.c.n, 0)).label("photos_analyzed"),
+            func.coalesce(days.c.n, 0).label("logging_days"),
+            func.coalesce(streaks.c.current_workout_streak, 0).label("current_workout_streak"),
+            func.coalesce(streaks.c.best_workout_streak, 0).label("best_workout_streak"),
+            streaks.c.last_workout_date,
+        )
+        .outerjoin(masks, masks.c.user_id == User.id)
+        .outerjoin(workouts, workouts.c.user_id == User.id)
+        .outerjoin(photos, photos.c.user_id == User.id)
+        .outerjoin(days, days.c.user_id == User.id)
+        .outerjoin(streaks, streaks.c.user_id == User.id)
+    )
+    if user_ids is not None:
+        query = query.where(User.id.in_(user_ids))
+    return query
+
+
+async def check(db: AsyncSession, user_ids: list | None = None) -> list[dict]:
+    """Users whose stored mask or counters differ from history."""
+    expected = expected_select(user_ids).subquery()
+    query = (
+        select(
+            User.id,
+            *(getattr(User, name) for name in COUNTERS),
+            *(expected.c[name].label(f"expected_{name}") for name in COUNTERS),
+        )
+        .join(expected, expected.c.user_id == User.id)
+        .where(or_(*(getattr(User, name).is_distinct_from(expected.c[name]) for name in COUNTERS)))
+        .order_by(User.id)
+    )
+    result = await db.execute(query)
+    return [dict(row._mapping) for row in result.all()]
+
+
+async def repair(db: AsyncSession, user_ids: list | None = None) -> int:
+    """Overwrite drifted masks and counters. Returns the number of users updated."""
+    expected = expected_select(user_ids).subquery()
+    result = await db.execute(
+        update(User)
+        .where(
+            User.id == expected.c.user_id,
+            or_(*(getattr(User, name).is_distinct_from(expected.c[name]) for name in COUNTERS)),
+        )
+        .values({name: expected.c[name] for name in COUNTERS})
+    )
+    return result.rowcount
+
+
+async def run(command: str, user_id: str | None) -> None:
+    user_ids = [user_id] if user_id else None
+    async with async_session_factory() as db:
+        if command == "repair":
+            updated = await repair(db, user_ids)
+            await db.commit()
+            print(f"🔧 Repaired gamification counters for {updated} users")
+            return
+
+        mismatches = await check(db, user_ids)
+        for row in mismatches[:50]:
+            print(f"❌ {row}")
+        if len(mismatches) > 50:
+            print(f"... and {len(mismatches) - 50} more")
+        print(f"{'⚠️' if mismatches else '✅'} {len(mismatches)} users with drifted gamification counters")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check or rebuild users' achievement mask and counters")
+    parser.add_argument("command", choices=["check", "repair"])
+    parser.add_argument("--user", help="Limit to one user id")
+    args = parser.parse_args()
+    asyncio.run(run(args.command, args.user))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""Import an Open Food Facts dump into the `products` table.
+
+Usage:
+    python -m app.scripts.import_off_dump openfoodfacts-products.jsonl.gz
+    python -m app.scripts.import_off_dump en.openfoodfacts.org.products.csv.gz
+
+Streams the (optionally gzip-compressed) JSONL or tab-separated CSV export
+line by line, keeps products with a Russian name and usable nutriments, and
+bulk-loads them with COPY into a staging table followed by an upsert. The
+number of source records consumed is committed with every batch, so an
+interrupted import resumes where it stopped.
+"""
+
+import argparse
+import asyncio
+import csv
+import gzip
+import io
+import json
+import os
+import sys
+import time
+from typing import Iterator
+
+import asyncpg
+
+from app.core.config import get_settings
+from app.models.product import Product, ProductImport
+from app.services.food_index import normalize
+
+COLUMNS = ("code", "name", "name_normalized", "brand", "calories", "protein", "fat", "carbs")
+NUTRIMENT_KEYS = {
+    "calories": "energy-kcal_100g",
+    "protein": "proteins_100g",
+    "fat": "fat_100g",
+    "carbs": "carbohydrates_100g",
+}
+
+
+def open_dump(path: str) -> io.TextIOBase:
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace", newline="")
+    return open(path, encoding="utf-8", errors="replace", newline="")
+
+
+def _number(value) -> float | None:
+    if value in (None, ""):
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if 0 <= number < 10_000 else None
+
+
+def extract_product(record: dict) -> tuple | None:
+    """Map a dump record to a `products` row, or None if it is not usable."""
+    code = str(record.get("code") or "").strip()
+    if not code or len(code) > 32:
+        return None
+
+    name = (record.get("product_name_ru") or "").strip()
+    if not name and (record.get("lang") == "ru" or record.get("lc") == "ru"):
+        name = (record.get("product_name") or "").strip()
+    if not name:
+        return None
+    name = name[:300]
+
+    # JSONL nests nutriments, the CSV export flattens them into columns
+    nutriments = record.get("nutriments") or record
+    values = {field: _number(nutriments.get(key)) for field, key in NUTRIMENT_KEYS.items()}
+    if values["calories"] is None or sum(v is not None for v in values.values()) < 3:
+        return None
+
+    brand = (record.get("brands") or "").split(",")[0].strip()[:200] or None
+
+    return (
+        code,
+        name,
+        normalize(name)[:300],
+        brand,
+        *(round(values[field] or 0.0, 1) for field in NUTRIMENT_KEYS),
+    )
+
+
+def read_records(f: io.TextIOBase, is_csv: bool, skip: int) -> Iterator[tuple[int, dict | None]]:
+    """Yield (record_number, record) pairs after skipping `skip` records."""
+    if is_csv:
+        csv.field_size_limit(sys.maxsize)
+        reader = csv.reader(f, delimiter="\t", quoting=csv.QUOTE_NONE)
+        header = next(reader)
+        for record_no, values in enumerate(reader, start=1):
+            if record_no > skip:
+                yield record_no, dict(zip(header, values))
+    else:
+        for record_no, line in enumerate(f, start=1):
+            if record_no <= skip:
+                continue
+            try:
+                yield record_no, json.loads(line)
+            except json.JSONDecodeError:
+                yield record_no, None
+
+
+async def ensure_schema(conn: asyncpg.Connection) -> None:
+    """Create the products tables and search indexes if migrations have not."""
+    from sqlalchemy.dialects import postgresql
+    from sqlalchemy.schema import CreateIndex, CreateTable
+
+    dialect = postgresql.dialect()
+    await conn.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for table in (Product.__table__, ProductImport.__table__):
+        ddl = str(CreateTable(table, if_not_exists=True).compile(dialect=dialect))
+        await conn.execute(ddl)
+        for index in table.indexes:
+            await conn.execute(str(CreateIndex(index, if_not_exists=True).compile(dialect=dialect)))
+
+
+async def load_batch(
+    conn: asyncpg.Connection, source: str, batch: list[tuple], records_done: int, rows_loaded: int
+) -> None:
+    """COPY one batch into staging, upsert it and advance the checkpoint atomically."""
+    async with conn.transaction():
+        if batch:
+            await conn.copy_records_to_table("products_staging", records=batch, columns=COLUMNS)
+            await conn.execute(
+                f"""
+                INSERT INTO products ({", ".join(COLUMNS)}, source, updated_at)
+                SELECT DISTINCT ON (code) {", ".join(COLUMNS)}, 'off_dump', now()
+                FROM products_staging
+                ORDER BY code
+                ON CONFLICT (code) DO UPDATE SET
+                    name = EXCLUDED.name,
+                    name_normalized = EXCLUDED.name_normalized,
+                    brand = EXCLUDED.brand,
+                    calories = EXCLUDED.calories,
+                    protein = EXCLUDED.protein,
+                    fat = EXCLUDED.fat,
+                    carbs = EXCLUDED.carbs,
+                    source = EXCLUDED.source,
+                    updated_at = now()
+                """
+            )
+            await conn.execute("TRUNCATE products_staging")
+        await conn.execute(
+            """
+            INSERT INTO product_imports (source, records_done, rows_loaded, updated_at)
+            VALUES ($1, $2, $3, now())
+            ON CONFLICT (source) DO UPDATE SET
+                records_done = EXCLUDED.records_done,
+                rows_loaded = EXCLUDED.rows_loaded,
+                updated_at = now()
+            """,
+            source, records_done, rows_loaded,
+        )
+
+
+async def run_import(path: str, batch_size: int, restart: bool) -> None:
+    settings = get_settings()
+    dsn = settings.DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://")
+    source = os.path.basename(path)
+    is_csv = ".csv" in source or ".tsv" in source
+
+    conn = await asyncpg.connect(dsn)
+    try:
+        await ensure_schema(conn)
+        await conn.execute(
+            "CREATE TEMP TABLE products_staging "
+            f"AS SELECT {', '.join(COLUMNS)} FROM products WITH NO DATA"
+        )
+
+        if restart:
+            await conn.execute("DELETE FROM product_imports WHERE source = $1", source)
+        checkpoint = await conn.fetchrow(
+            "SELECT records_done, rows_loaded FROM product_imports WHERE source = $1", source
+        )
+        records_done = checkpoint["records_done"] if checkpoint else 0
+        rows_loaded = checkpoint["rows_loaded"] if checkpoint else 0
+        if records_done:
+            print(f"⏩ Resuming {source} after record {records_done} ({rows_loaded} rows loaded)")
+
+        started = time.perf_counter()
+        session_rows = 0
+        batch: list[tuple] = []
+        with open_dump(path) as f:
+            for record_no, record in read_records(f, is_csv, records_done):
+                row = extract_product(record) if record else None
+                if row:
+                    batch.append(row)
+                records_done = record_no
+                if len(batch) >= batch_size:
+                    rows_loaded += len(batch)
+                    session_rows += len(batch)
+                    await load_batch(conn, source, batch, records_done, rows_loaded)
+                    batch.clear()
+                    elapsed = time.perf_counter() - started
+                    print(
+                        f"📥 record {records_done}: {rows_loaded} rows "
+                        f"({session_rows / elapsed:.0f} rows/s)"
+                    )
+
+        rows_loaded += len(batch)
+        session_rows += len(batch)
+        await load_batch(conn, source, batch, records_done, rows_loaded)
+
+        elapsed = time.perf_counter() - started
+        await conn.execute("ANALYZE products")
+        print(
+            f"✅ Imported {session_rows} rows from {source} in {elapsed:.1f}s "
+            f"({session_rows / max(elapsed, 1e-9):.0f} rows/s), {rows_loaded} total"
+        )
+    finally:
+        await conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import an Open Food Facts dump")
+    parser.add_argument("path", help="JSONL or CSV export, optionally .gz")
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--restart", action="store_true", help="Ignore the saved checkpoint")
+    args = parser.parse_args()
+    asyncio.run(run_import(args.path, args.batch_size, args.restart))
+
+
+if __name__ == "__main__":
+    main()
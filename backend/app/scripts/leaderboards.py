@@ -0,0 +1,39 @@
+"""Rebuild the Redis leaderboards from Postgres.
+
+Usage:
+    python -m app.scripts.leaderboards rebuild
+
+Boards are updated incrementally after each committed gamification event;
+run this once when enabling Redis, or after Redis lost its data.
+"""
+
+import argparse
+import asyncio
+
+from app.core.database import async_session_factory
+from app.core.redis import close_redis, init_redis
+from app.services import leaderboard_service
+
+
+async def run() -> None:
+    if await init_redis() is None:
+        print("❌ Redis is not available")
+        return
+    try:
+        async with async_session_factory() as db:
+            counts = await leaderboard_service.rebuild(db)
+        for board, count in counts.items():
+            print(f"🏆 {board}: {count} users")
+    finally:
+        await close_redis()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild Redis leaderboards from Postgres")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.parse_args()
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -2,16 +2,40 @@
 
 import json
 import base64
+import hashlib
 from typing import Optional
 
 from openai import AsyncOpenAI
 
 from app.core.config import get_settings
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.photo_cache import PhotoResultCache
+from app.services.single_flight import SingleFlight
 
 settings = get_settings()
 
 client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY) if settings.OPENAI_API_KEY else None
 
+# Identical photos submitted concurrently (double taps, retries) share one call
+photo_flight = SingleFlight("openai_photo_analysis")
+
+# While OpenAI is failing or degraded, photo analysis fails fast instead of piling up
+openai_breaker = CircuitBreaker(
+    "openai",
+    failure_rate=settings.CIRCUIT_FAILURE_RATE,
+    window=settings.CIRCUIT_WINDOW,
+    min_calls=settings.CIRCUIT_MIN_CALLS,
+    slow_call_seconds=settings.OPENAI_SLOW_CALL_SECONDS,
+    open_seconds=settings.CIRCUIT_OPEN_SECONDS,
+)
+
+# Re-photographed meals and re-uploads reuse an earlier result
+photo_cache = PhotoResultCache(
+    ttl=settings.PHOTO_CACHE_TTL,
+    max_distance=settings.PHOTO_CACHE_MAX_DISTANCE,
+    max_entries=settings.PHOTO_CACHE_MAX_ENTRIES,
+)
+
 SYSTEM_PROMPT = """You are a nutrition expert. Analyze the food image and return ONLY valid JSON, no explanations.
 Response format:
 {
@@ -26,17 +50,41 @@ Response format:
 If confidence < 0.6, still return your best guess but with the low confidence value."""
 
 
-async def analyze_food_photo(image_bytes: bytes, mime_type: str = "image/jpeg") -> dict:
+def cached_analysis(image_bytes: bytes, phash: int | None = None) -> dict | None:
+    """A cached result for this photo or a near-duplicate of it, if any."""
+    result = photo_cache.get(hashlib.sha256(image_bytes).hexdigest(), phash)
+    return dict(result) if result is not None else None
+
+
+async def analyze_food_photo(
+    image_bytes: bytes, mime_type: str = "image/jpeg", phash: int | None = None
+) -> dict:
     """
     Send a food photo to GPT-4o Vision for analysis.
     Returns parsed nutrition data dict.
+    `phash` (perceptual hash) lets near-duplicate photos share a cached result.
     """
+    key = hashlib.sha256(image_bytes).hexdigest()
+    cached = photo_cache.get(key, phash)
+    if cached is not None:
+        return dict(cached)
+
     if not client:
         raise ValueError("OpenAI API key not configured")
 
+    result = await photo_flight.do(key, lambda: _request_analysis(image_bytes, mime_type))
+    # Low-confidence guesses are not worth repeating for similar photos
+    if (result.get("confidence") or 0) >= settings.PHOTO_CACHE_MIN_CONFIDENCE:
+        photo_cache.set(key, phash, result)
+    # Each caller gets its own copy of the shared result
+    return dict(result)
+
+
+async def _request_analysis(image_bytes: bytes, mime_type: str) -> dict:
+    """Single GPT-4o Vision round trip for one photo."""
     base64_image = base64.b64encode(image_bytes).decode("utf-8")
 
-    response = await client.chat.completions.create(
+    response = await openai_breaker.call(lambda: client.chat.completions.create(
         model="gpt-4o",
         messages=[
             {"role": "system", "content": SYSTEM_PROMPT},
@@ -56,7 +104,7 @@ async def analyze_food_photo(image_bytes: bytes, mime_type: str = "image/jpeg")
         ],
         max_tokens=500,
         temperature=0.1,
-    )
+    ))
 
     content = response.choices[0].message.content.strip()
 
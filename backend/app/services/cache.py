@@ -0,0 +1,170 @@
+"""Cache service — in-process LRU with TTL in front of an optional Redis tier."""
+
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable
+
+from app.core.redis import get_redis
+
+
+@dataclass
+class CacheStats:
+    local_hits: int = 0
+    redis_hits: int = 0
+    misses: int = 0
+    negative_hits: int = 0
+    stale_hits: int = 0
+    refreshes: int = 0
+    redis_errors: int = 0
+
+    def as_dict(self) -> dict:
+        data = asdict(self)
+        lookups = self.local_hits + self.redis_hits + self.misses
+        data["hit_rate"] = round((self.local_hits + self.redis_hits) / lookups, 3) if lookups else 0.0
+        return data
+
+
+class LRUCache:
+    """Bounded in-process LRU whose entries carry absolute expiry times."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._data: OrderedDict[str, tuple[Any, float, float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> tuple[Any, float, float] | None:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[2] <= time.time():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return entry
+
+    def set(self, key: str, value: Any, fresh_until: float, stale_until: float) -> None:
+        self._data[key] = (value, fresh_until, stale_until)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+
+class TwoTierCache:
+    """
+    Read-through cache: local LRU → Redis → loader.
+
+    Empty results are cached for `negative_ttl` only. Entries past their
+    TTL but within `stale_ttl` are served immediately while one
+    background task refreshes them. Values must be JSON-serializable.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        ttl: float,
+        negative_ttl: float,
+        stale_ttl: float = 0,
+        max_entries: int = 10_000,
+    ):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.stale_ttl = stale_ttl
+        self.local = LRUCache(max_entries)
+        self.stats = CacheStats()
+        self._refreshing: dict[str, asyncio.Task] = {}
+
+    def _redis_key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        now = time.time()
+
+        entry = self.local.get(key)
+        if entry is None:
+            entry = await self._redis_get(key)
+            if entry is not None:
+                self.local.set(key, *entry)
+                self.stats.redis_hits += 1
+        else:
+            self.stats.local_hits += 1
+
+        if entry is None:
+            self.stats.misses += 1
+            return await self._load(key, loader)
+
+        value, fresh_until, _ = entry
+        if not value:
+            self.stats.negative_hits += 1
+        if fresh_until <= now:
+            self.stats.stale_hits += 1
+            self._refresh_in_background(key, loader)
+        return value
+
+    async def _load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        value = await loader()
+        await self.set(key, value)
+        return value
+
+    async def set(self, key: str, value: Any) -> None:
+        ttl = self.ttl if value else self.negative_ttl
+        stale_ttl = self.stale_ttl if value else 0
+        fresh_until = time.time() + ttl
+        stale_until = fresh_until + stale_ttl
+        self.local.set(key, value, fresh_until, stale_until)
+
+        redis = get_redis()
+        if redis is None:
+            return
+        payload = json.dumps({"v": value, "f": fresh_until, "s": stale_until}, ensure_ascii=False)
+        try:
+            await redis.set(self._redis_key(key), payload, ex=max(1, int(ttl + stale_ttl)))
+        except Exception:
+            self.stats.redis_errors += 1
+
+    async def invalidate(self, key: str) -> None:
+        self.local.delete(key)
+        redis = get_redis()
+        if redis is None:
+            return
+        try:
+            await redis.delete(self._redis_key(key))
+        except Exception:
+            self.stats.redis_errors += 1
+
+    async def _redis_get(self, key: str) -> tuple[Any, float, float] | None:
+        redis = get_redis()
+        if redis is None:
+            return None
+        try:
+            raw = await redis.get(self._redis_key(key))
+        except Exception:
+            self.stats.redis_errors += 1
+            return None
+        if raw is None:
+            return None
+        data = json.loads(raw)
+        return data["v"], data["f"], data["s"]
+
+    def _refresh_in_background(self, key: str, loader: Callable[[], Awaitable[Any]]) -> None:
+        if key in self._refreshing:
+            return
+        self.stats.refreshes += 1
+        task = asyncio.create_task(self._load(key, loader))
+        self._refreshing[key] = task
+
+        def done(task: asyncio.Task) -> None:
+            self._refreshing.pop(key, None)
+            # A failed refresh keeps serving the stale value until it lapses
+            if not task.cancelled():
+                task.exception()
+
+        task.add_done_callback(done)
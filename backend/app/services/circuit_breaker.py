@@ -0,0 +1,148 @@
+"""Circuit breaker — fail fast while an outbound integration is unhealthy."""
+
+import asyncio
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """The breaker is open; the call was not attempted."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} circuit is open")
+        self.name = name
+        self.retry_after = retry_after
+
+
+@dataclass
+class CircuitBreakerStats:
+    calls: int = 0
+    successes: int = 0
+    failures: int = 0
+    slow_calls: int = 0
+    rejected: int = 0
+    opened: int = 0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+class CircuitBreaker:
+    """
+    Closed → open when, over the last `window` calls (at least `min_calls`),
+    the share of failed or slow calls reaches `failure_rate`. Calls slower than
+    `slow_call_seconds` count as failures even if they succeed.
+
+    Open → half-open after `open_seconds`; up to `half_open_calls` probes are
+    let through. A successful probe closes the breaker, a failed one reopens it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate: float = 0.5,
+        window: int = 20,
+        min_calls: int = 5,
+        slow_call_seconds: float | None = None,
+        open_seconds: float = 30.0,
+        half_open_calls: int = 1,
+    ):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self.stats = CircuitBreakerStats()
+        self._outcomes: deque[bool] = deque(maxlen=window)  # True = failed or slow
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    def retry_after(self) -> float:
+        return max(0.0, self._opened_at + self.open_seconds - time.monotonic())
+
+    def rejecting(self) -> bool:
+        """True if a call made now would be rejected without being attempted."""
+        state = self.state
+        return state == OPEN or (state == HALF_OPEN and self._probes >= self.half_open_calls)
+
+    async def call(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        if self.rejecting():
+            self.stats.rejected += 1
+            raise CircuitOpenError(self.name, self.retry_after())
+
+        probing = self._state == HALF_OPEN
+        if probing:
+            self._probes += 1
+        self.stats.calls += 1
+        started = time.monotonic()
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            # Callers give up on slow calls with timeouts; count those, ignore the rest
+            if self._is_slow(started):
+                self._record(True, probing)
+            elif probing:
+                self._probes -= 1
+            raise
+        except Exception:
+            self.stats.failures += 1
+            self._record(True, probing)
+            raise
+
+        self._record(self._is_slow(started), probing)
+        return result
+
+    def _is_slow(self, started: float) -> bool:
+        if self.slow_call_seconds is None or time.monotonic() - started < self.slow_call_seconds:
+            return False
+        self.stats.slow_calls += 1
+        return True
+
+    def _record(self, failed: bool, probing: bool) -> None:
+        if not failed:
+            self.stats.successes += 1
+
+        if probing:
+            if failed:
+                self._open()
+            else:
+                self._state = CLOSED
+                self._outcomes.clear()
+            return
+
+        self._outcomes.append(failed)
+        if (
+            self._state == CLOSED
+            and len(self._outcomes) >= self.min_calls
+            and sum(self._outcomes) / len(self._outcomes) >= self.failure_rate
+        ):
+            self._open()
+
+    def _open(self) -> None:
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self.stats.opened += 1
+
+    def as_dict(self) -> dict:
+        data = self.stats.as_dict()
+        data["state"] = self.state
+        data["window_failure_rate"] = (
+            round(sum(self._outcomes) / len(self._outcomes), 3) if self._outcomes else 0.0
+        )
+        return data
@@ -0,0 +1,244 @@
+"""Food catalog — compiled columnar storage, memory-mapped by every worker.
+
+File layout (little-endian, every section 8-byte aligned):
+
+    header    magic, version, row/word/gram counts, section table
+    names     display names (UTF-8 blob + uint32 offsets)
+    norm      normalized names (UTF-8 blob + uint32 offsets)
+    macros    calories, protein, fat, carbs as float32 columns
+    index     name-sorted row ids, word-prefix keys, gram keys + postings
+
+The file is mapped read-only, so the page cache is shared across uvicorn
+workers and loading does no parsing. Product dicts are materialized only
+for the rows that end up in a search result.
+"""
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from collections.abc import Iterable, Sequence
+from functools import lru_cache
+from pathlib import Path
+
+from app.core.config import get_settings
+from app.services.food_index import FoodIndex
+
+settings = get_settings()
+
+MAGIC = b"NBFC"
+VERSION = 1
+MACRO_FIELDS = ("calories", "protein", "fat", "carbs")
+
+SECTIONS = (
+    "names", "name_offsets",
+    "norm", "norm_offsets",
+    *MACRO_FIELDS,
+    "by_name", "word_keys",
+    "gram_keys", "gram_starts", "postings",
+)
+SECTION_TYPES = {
+    "names": "B", "norm": "B",
+    "name_offsets": "I", "norm_offsets": "I",
+    "calories": "f", "protein": "f", "fat": "f", "carbs": "f",
+    "by_name": "I", "word_keys": "Q",
+    "gram_keys": "Q", "gram_starts": "I", "postings": "I",
+}
+
+_HEADER = struct.Struct("<4sIIII")
+_SECTION = struct.Struct("<QQ")
+_ALIGN = 8
+
+
+def gram_key(gram: str) -> int:
+    """Pack a 2- or 3-character gram into a sortable uint64."""
+    key = 0
+    for i in range(3):
+        key = (key << 21) | (ord(gram[i]) + 1 if i < len(gram) else 0)
+    return key
+
+
+def _string_column(values: Iterable[str]) -> tuple[bytes, array]:
+    blob = bytearray()
+    offsets = array("I", [0])
+    for value in values:
+        blob += value.encode("utf-8")
+        offsets.append(len(blob))
+    return bytes(blob), offsets
+
+
+def compile_catalog(items: Sequence[dict], path: str | Path) -> int:
+    """
+    Compile product dicts into a catalog file at `path`.
+    Written to a temp file and renamed, so running workers keep their mapping.
+    Returns the number of rows written.
+    """
+    if sys.byteorder != "little":
+        raise RuntimeError("Food catalog files are little-endian only")
+
+    index = FoodIndex.build(items)
+
+    names, name_offsets = _string_column(item["name"] for item in items)
+    norm, norm_offsets = _string_column(index.names)
+
+    gram_items = sorted((gram_key(gram), posting) for gram, posting in index.postings.items())
+    gram_keys = array("Q", (key for key, _ in gram_items))
+    gram_starts = array("I", [0])
+    postings = array("I")
+    for _, posting in gram_items:
+        postings.extend(posting)
+        gram_starts.append(len(postings))
+
+    columns = {
+        "names": names,
+        "name_offsets": name_offsets,
+        "norm": norm,
+        "norm_offsets": norm_offsets,
+        **{
+            field: array("f", (float(item.get(field) or 0) for item in items))
+            for field in MACRO_FIELDS
+        },
+        "by_name": index.by_name,
+        "word_keys": index.word_keys,
+        "gram_keys": gram_keys,
+        "gram_starts": gram_starts,
+        "postings": postings,
+    }
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+
+    offset = _HEADER.size + _SECTION.size * len(SECTIONS)
+    table = []
+    payload = []
+    for name in SECTIONS:
+        data = bytes(columns[name])
+        offset += -offset % _ALIGN
+        table.append((offset, len(data)))
+        payload.append((offset, data))
+        offset += len(data)
+
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, len(items), len(index.word_keys), len(gram_keys)))
+        for section in table:
+            f.write(_SECTION.pack(*section))
+        for section_offset, data in payload:
+            f.write(b"\0" * (section_offset - f.tell()))
+            f.write(data)
+
+    os.replace(tmp_path, path)
+    return len(items)
+
+
+class _StringColumn(Sequence):
+    """Lazily decoded view over a UTF-8 blob + offsets pair."""
+
+    def __init__(self, blob: memoryview, offsets: memoryview):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row: int) -> str:
+        return str(self.blob[self.offsets[row]:self.offsets[row + 1]], "utf-8")
+
+
+class _RowColumn(Sequence):
+    """Product dicts built on access from the columnar sections."""
+
+    def __init__(self, names: _StringColumn, macros: dict[str, memoryview]):
+        self.names = names
+        self.macros = macros
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __getitem__(self, row: int) -> dict:
+        item = {"name": self.names[row]}
+        for field, column in self.macros.items():
+            value = round(column[row], 1)
+            item[field] = int(value) if value.is_integer() else value
+        return item
+
+
+class _GramTable:
+    """Read-only gram → posting list lookup over sorted uint64 keys."""
+
+    def __init__(self, keys: memoryview, starts: memoryview, postings: memoryview):
+        self.keys = keys
+        self.starts = starts
+        self.postings = postings
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def get(self, gram: str):
+        key = gram_key(gram)
+        i = bisect_left(self.keys, key)
+        if i == len(self.keys) or self.keys[i] != key:
+            return None
+        return self.postings[self.starts[i]:self.starts[i + 1]]
+
+
+class CompiledFoodIndex(FoodIndex):
+    """FoodIndex whose columns live in a read-only memory map."""
+
+    def __init__(self, mm: mmap.mmap, sections: dict[str, memoryview], norm_base: int):
+        self.mm = mm
+        self._norm_offsets = sections["norm_offsets"]
+        self._norm_base = norm_base
+        names = _StringColumn(sections["names"], sections["name_offsets"])
+        super().__init__(
+            items=_RowColumn(names, {field: sections[field] for field in MACRO_FIELDS}),
+            names=_StringColumn(sections["norm"], sections["norm_offsets"]),
+            by_name=sections["by_name"],
+            word_keys=sections["word_keys"],
+            postings=_GramTable(sections["gram_keys"], sections["gram_starts"], sections["postings"]),
+        )
+
+    def _substring_matcher(self, q: str):
+        # Search the mapped bytes directly instead of decoding every candidate
+        needle = q.encode("utf-8")
+        find = self.mm.find
+        offsets = self._norm_offsets
+        base = self._norm_base
+        return lambda row: find(needle, base + offsets[row], base + offsets[row + 1]) != -1
+
+
+def load_catalog(path: str | Path) -> CompiledFoodIndex:
+    """Memory-map a compiled catalog file read-only."""
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, version, _, _, _ = _HEADER.unpack_from(mm, 0)
+    if magic != MAGIC or version != VERSION:
+        mm.close()
+        raise ValueError(f"Unsupported food catalog file: {path}")
+
+    view = memoryview(mm)
+    sections = {}
+    offsets = {}
+    for i, name in enumerate(SECTIONS):
+        offset, length = _SECTION.unpack_from(mm, _HEADER.size + i * _SECTION.size)
+        sections[name] = view[offset:offset + length].cast(SECTION_TYPES[name])
+        offsets[name] = offset
+
+    return CompiledFoodIndex(mm, sections, norm_base=offsets["norm"])
+
+
+@lru_cache()
+def get_food_index() -> FoodIndex:
+    """
+    Catalog index for this process.
+    Maps the compiled catalog if present, else indexes LOCAL_FOOD_DB in memory.
+    """
+    if os.path.exists(settings.FOOD_CATALOG_PATH):
+        return load_catalog(settings.FOOD_CATALOG_PATH)
+
+    from app.services.food_service import LOCAL_FOOD_DB
+
+    return FoodIndex.build(LOCAL_FOOD_DB)
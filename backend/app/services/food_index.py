@@ -0,0 +1,158 @@
+"""Food index — in-memory typeahead index over the product catalog."""
+
+from array import array
+from bisect import bisect_left
+from typing import Sequence
+
+# Sort key offsets are packed next to the row id: (row << 8) | offset
+_OFFSET_BITS = 8
+_OFFSET_MASK = (1 << _OFFSET_BITS) - 1
+
+# Indexed n-gram lengths; single-character queries fall back to a scan
+GRAM_SIZES = (2, 3)
+
+
+def normalize(text: str) -> str:
+    """Lowercase, fold ё→е and collapse whitespace."""
+    return " ".join(text.lower().replace("ё", "е").split())
+
+
+def word_starts(name: str) -> list[int]:
+    """Offsets of every word after the first one in a normalized name."""
+    return [i + 1 for i, ch in enumerate(name) if ch == " " and i + 1 < len(name)]
+
+
+def grams(text: str) -> set[str]:
+    """All indexed n-grams of a normalized string."""
+    result = set()
+    for n in GRAM_SIZES:
+        for i in range(len(text) - n + 1):
+            result.add(text[i:i + n])
+    return result
+
+
+class FoodIndex:
+    """
+    Ranked substring index over product names.
+
+    Results are ordered by match quality: exact name, name prefix,
+    word prefix, then any substring. Within a tier rows come in name
+    order (prefix tiers) or catalog order (substring tier).
+    """
+
+    def __init__(
+        self,
+        items: Sequence[dict],
+        names: Sequence[str],
+        by_name: Sequence[int],
+        word_keys: Sequence[int],
+        postings,
+    ):
+        self.items = items
+        self.names = names
+        self.by_name = by_name
+        self.word_keys = word_keys
+        self.postings = postings
+
+    @classmethod
+    def build(cls, items: Sequence[dict]) -> "FoodIndex":
+        """Build the index from a list of product dicts with a `name` key."""
+        names = [normalize(item["name"]) for item in items]
+
+        by_name = array("I", sorted(range(len(names)), key=names.__getitem__))
+
+        word_entries = []
+        for row, name in enumerate(names):
+            for offset in word_starts(name):
+                if offset <= _OFFSET_MASK:
+                    word_entries.append((name[offset:], (row << _OFFSET_BITS) | offset))
+        word_entries.sort()
+        word_keys = array("Q", (key for _, key in word_entries))
+
+        postings: dict[str, array] = {}
+        for row, name in enumerate(names):
+            for gram in grams(name):
+                postings.setdefault(gram, array("I")).append(row)
+
+        return cls(items, names, by_name, word_keys, postings)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _word_suffix(self, key: int) -> str:
+        return self.names[key >> _OFFSET_BITS][key & _OFFSET_MASK:]
+
+    def search(self, query: str, limit: int = 20) -> list[dict]:
+        """Return up to `limit` items ranked exact → prefix → word prefix → substring."""
+        q = normalize(query)
+        if not q or limit <= 0:
+            return []
+
+        rows: list[int] = []
+        seen: set[int] = set()
+
+        def take(row: int) -> bool:
+            if row not in seen:
+                seen.add(row)
+                rows.append(row)
+            return len(rows) >= limit
+
+        names = self.names
+
+        # Exact and prefix matches share one range of the name-sorted ids
+        start = bisect_left(self.by_name, q, key=names.__getitem__)
+        prefix_rows = []
+        for i in range(start, len(self.by_name)):
+            row = self.by_name[i]
+            name = names[row]
+            if not name.startswith(q):
+                break
+            if name == q:
+                if take(row):
+                    return self._rows_to_items(rows)
+            else:
+                prefix_rows.append(row)
+                if len(prefix_rows) >= limit:
+                    break
+        for row in prefix_rows:
+            if take(row):
+                return self._rows_to_items(rows)
+
+        # Word-prefix matches: any later word of the name starts with the query
+        start = bisect_left(self.word_keys, q, key=self._word_suffix)
+        for i in range(start, len(self.word_keys)):
+            key = self.word_keys[i]
+            if not self._word_suffix(key).startswith(q):
+                break
+            if take(key >> _OFFSET_BITS):
+                return self._rows_to_items(rows)
+
+        # Substring matches: walk the rarest gram's posting list and verify
+        matches = self._substring_matcher(q)
+        for row in self._candidates(q):
+            if row in seen:
+                continue
+            if matches(row) and take(row):
+                break
+
+        return self._rows_to_items(rows)
+
+    def _substring_matcher(self, q: str):
+        names = self.names
+        return lambda row: q in names[row]
+
+    def _candidates(self, q: str):
+        if len(q) < GRAM_SIZES[0]:
+            return range(len(self.names))
+        n = min(len(q), GRAM_SIZES[-1])
+        best = None
+        for i in range(len(q) - n + 1):
+            posting = self.postings.get(q[i:i + n])
+            if posting is None:
+                return ()
+            if best is None or len(posting) < len(best):
+                best = posting
+        return best
+
+    def _rows_to_items(self, rows: list[int]) -> list[dict]:
+        return [self.items[row] for row in rows]
@@ -1,8 +1,55 @@
 """Food service — search, local DB, Open Food Facts API."""
 
+import asyncio
 from typing import Optional
 
-import httpx
+from sqlalchemy import case, func, literal, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.core.http import get_http_client
+from app.models.product import Product
+from app.services.cache import TwoTierCache
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.services.food_catalog import get_food_index
+from app.services.food_index import normalize
+from app.services.single_flight import SingleFlight
+
+settings = get_settings()
+
+# External search results, keyed on the normalized query and limit
+search_cache = TwoTierCache(
+    "food_search",
+    ttl=settings.FOOD_SEARCH_CACHE_TTL,
+    negative_ttl=settings.FOOD_SEARCH_NEGATIVE_TTL,
+    stale_ttl=settings.FOOD_SEARCH_STALE_TTL,
+    max_entries=settings.FOOD_SEARCH_CACHE_MAX_ENTRIES,
+)
+
+# Concurrent cache misses for the same key share one upstream request
+search_flight = SingleFlight("open_food_facts_search")
+
+# Barcode lookups that missed the products table; {} marks an unknown code
+barcode_cache = TwoTierCache(
+    "food_barcode",
+    ttl=settings.FOOD_SEARCH_CACHE_TTL,
+    negative_ttl=settings.FOOD_SEARCH_NEGATIVE_TTL,
+    max_entries=settings.FOOD_SEARCH_CACHE_MAX_ENTRIES,
+)
+barcode_flight = SingleFlight("open_food_facts_product")
+# A batch of unknown barcodes must not fan out into a burst of product API calls
+barcode_fetch_limit = asyncio.Semaphore(settings.OPEN_FOOD_FACTS_BARCODE_CONCURRENCY)
+
+# While Open Food Facts is failing or slow, skip it and serve local and cached results
+off_breaker = CircuitBreaker(
+    "open_food_facts",
+    failure_rate=settings.CIRCUIT_FAILURE_RATE,
+    window=settings.CIRCUIT_WINDOW,
+    min_calls=settings.CIRCUIT_MIN_CALLS,
+    slow_call_seconds=settings.OPEN_FOOD_FACTS_SLOW_CALL_SECONDS,
+    open_seconds=settings.CIRCUIT_OPEN_SECONDS,
+)
 
 # Top-1000 popular Russian products (abbreviated sample — extend as needed)
 LOCAL_FOOD_DB = [
@@ -60,20 +107,24 @@ LOCAL_FOOD_DB = [
 
 
 def search_local(query: str, limit: int = 20) -> list[dict]:
-    """Search the local food database (case-insensitive substring match)."""
-    query_lower = query.lower()
-    results = []
-    for item in LOCAL_FOOD_DB:
-        if query_lower in item["name"].lower():
-            results.append(item)
-            if len(results) >= limit:
-                break
-    return results
+    """Search the local food database (ranked, ё/е-insensitive)."""
+    return get_food_index().search(query, limit)
+
+
+async def _open_food_facts_get(url: str, params: dict) -> dict:
+    """GET an Open Food Facts endpoint through the circuit breaker. Raises on 5xx."""
+    async def request() -> dict:
+        resp = await get_http_client().get(url, params=params)
+        if resp.status_code >= 500:
+            resp.raise_for_status()
+        return resp.json()
+
+    return await off_breaker.call(request)
 
 
 async def search_open_food_facts(query: str, limit: int = 20) -> list[dict]:
-    """Search Open Food Facts API for products."""
-    url = "https://world.openfoodfacts.org/cgi/search.pl"
+    """Search Open Food Facts API for products. Raises if the API is unavailable."""
+    url = f"{settings.OPEN_FOOD_FACTS_URL}/cgi/search.pl"
     params = {
         "search_terms": query,
         "search_simple": 1,
@@ -83,50 +134,224 @@ async def search_open_food_facts(query: str, limit: int = 20) -> list[dict]:
         "lc": "ru",
     }
 
-    try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            resp = await client.get(url, params=params)
-            data = resp.json()
-
-        results = []
-        for product in data.get("products", []):
-            nutriments = product.get("nutriments", {})
-            name = product.get("product_name", "").strip()
-            if not name:
-                continue
-
-            results.append({
-                "name": name,
-                "calories": round(nutriments.get("energy-kcal_100g", 0)),
-                "protein": round(nutriments.get("proteins_100g", 0), 1),
-                "fat": round(nutriments.get("fat_100g", 0), 1),
-                "carbs": round(nutriments.get("carbohydrates_100g", 0), 1),
-                "barcode": product.get("code", ""),
-            })
+    data = await _open_food_facts_get(url, params)
 
-        return results
-    except Exception:
+    results = []
+    for product in data.get("products", []):
+        nutriments = product.get("nutriments", {})
+        name = product.get("product_name", "").strip()
+        if not name:
+            continue
+
+        results.append({
+            "name": name,
+            "calories": round(nutriments.get("energy-kcal_100g", 0)),
+            "protein": round(nutriments.get("proteins_100g", 0), 1),
+            "fat": round(nutriments.get("fat_100g", 0), 1),
+            "carbs": round(nutriments.get("carbohydrates_100g", 0), 1),
+            "barcode": product.get("code", ""),
+        })
+
+    return results
+
+
+# pg_trgm cannot use its index for a substring shorter than one trigram
+TRIGRAM_MIN_LENGTH = 3
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _product_to_dict(product: Product) -> dict:
+    return {
+        "name": product.name,
+        "calories": round(product.calories),
+        "protein": round(product.protein or 0, 1),
+        "fat": round(product.fat or 0, 1),
+        "carbs": round(product.carbs or 0, 1),
+        "barcode": product.code,
+    }
+
+
+async def search_products(db: AsyncSession, query: str, limit: int = 20) -> list[dict]:
+    """
+    Search the imported Open Food Facts catalog (`products` table).
+    LIKE is served by the trigram GIN index; ranking is exact → prefix → similarity.
+    Queries shorter than a trigram only match name prefixes, via the
+    text_pattern_ops btree, instead of scanning the whole table.
+    """
+    q = normalize(query)
+    if not q:
         return []
+    pattern = _escape_like(q)
+    if len(q) < TRIGRAM_MIN_LENGTH:
+        result = await db.execute(
+            select(Product)
+            .where(Product.name_normalized.like(f"{pattern}%"))
+            .order_by(Product.name_normalized)
+            .limit(limit)
+        )
+        return [_product_to_dict(p) for p in result.scalars().all()]
+    result = await db.execute(
+        select(Product)
+        .where(Product.name_normalized.like(f"%{pattern}%"))
+        .order_by(
+            case(
+                (Product.name_normalized == q, 0),
+                (Product.name_normalized.like(f"{pattern}%"), 1),
+                else_=2,
+            ),
+            func.similarity(Product.name_normalized, literal(q)).desc(),
+            Product.name_normalized,
+        )
+        .limit(limit)
+    )
+    return [_product_to_dict(p) for p in result.scalars().all()]
 
 
-async def search_food(query: str, limit: int = 20) -> list[dict]:
+async def search_external(query: str, limit: int = 20) -> list[dict]:
     """
-    Combined search: local DB first, then Open Food Facts.
-    Priority: local results first, then API results.
+    Open Food Facts search behind the two-tier result cache.
+    Upstream errors return [] without being cached as a negative result.
     """
-    local_results = search_local(query, limit)
+    key = f"{normalize(query)}:{limit}"
+    try:
+        return await search_cache.get_or_load(
+            key, lambda: search_flight.do(key, lambda: search_open_food_facts(query, limit))
+        )
+    except CircuitOpenError:
+        return []
+    except Exception as e:
+        print(f"Open Food Facts search failed: {e}")
+        return []
 
-    if len(local_results) >= limit:
-        return local_results
 
-    remaining = limit - len(local_results)
-    api_results = await search_open_food_facts(query, remaining)
+async def search_food(query: str, limit: int = 20, db: AsyncSession | None = None) -> list[dict]:
+    """
+    Combined search: local DB first, then the imported product table.
+    Open Food Facts API is used only when the product table has no match.
+    """
+    results = search_local(query, limit)
+
+    if len(results) >= limit:
+        return results
+
+    remaining = limit - len(results)
+    extra = []
+    if db is not None:
+        try:
+            extra = await search_products(db, query, remaining)
+        except Exception as e:
+            print(f"Product table search failed, falling back to API: {e}")
+            await db.rollback()
+    if not extra:
+        extra = await search_external(query, remaining)
 
     # Deduplicate by name
-    seen_names = {r["name"].lower() for r in local_results}
-    for item in api_results:
+    seen_names = {r["name"].lower() for r in results}
+    for item in extra:
         if item["name"].lower() not in seen_names:
-            local_results.append(item)
+            results.append(item)
             seen_names.add(item["name"].lower())
 
-    return local_results[:limit]
+    return results[:limit]
+
+
+def is_valid_barcode(code: str) -> bool:
+    """EAN/UPC-style codes: digits only, as stored in `products.code`."""
+    return code.isdigit() and 4 <= len(code) <= 32
+
+
+async def fetch_open_food_facts_product(code: str) -> dict:
+    """
+    Fetch one product by barcode from the Open Food Facts product API.
+    {} if unknown; raises if the API is unavailable.
+    """
+    url = f"{settings.OPEN_FOOD_FACTS_URL}/api/v2/product/{code}.json"
+    params = {"fields": "code,product_name,product_name_ru,brands,nutriments"}
+
+    data = await _open_food_facts_get(url, params)
+
+    product = data.get("product") or {}
+    nutriments = product.get("nutriments", {})
+    name = (product.get("product_name_ru") or product.get("product_name") or "").strip()
+    if data.get("status") != 1 or not name or "energy-kcal_100g" not in nutriments:
+        return {}
+
+    return {
+        "name": name[:300],
+        "calories": round(nutriments.get("energy-kcal_100g", 0)),
+        "protein": round(nutriments.get("proteins_100g", 0), 1),
+        "fat": round(nutriments.get("fat_100g", 0), 1),
+        "carbs": round(nutriments.get("carbohydrates_100g", 0), 1),
+        "barcode": code,
+        "brand": (product.get("brands") or "").split(",")[0].strip()[:200] or None,
+    }
+
+
+async def _fetch_product_limited(code: str) -> dict:
+    async with barcode_fetch_limit:
+        return await fetch_open_food_facts_product(code)
+
+
+async def _lookup_remote_barcode(code: str) -> dict:
+    try:
+        return await barcode_cache.get_or_load(
+            code, lambda: barcode_flight.do(code, lambda: _fetch_product_limited(code))
+        )
+    except CircuitOpenError:
+        return {}
+    except Exception as e:
+        print(f"Open Food Facts product lookup failed: {e}")
+        return {}
+
+
+async def lookup_barcodes(db: AsyncSession, codes: list[str]) -> dict[str, dict | None]:
+    """
+    Resolve barcodes: products table (one primary-key query for the whole batch),
+    then the barcode cache, then the Open Food Facts product API.
+    API hits are written back to `products` so the next lookup stays local.
+    """
+    codes = list(dict.fromkeys(codes))
+    found: dict[str, dict | None] = {}
+
+    try:
+        result = await db.execute(select(Product).where(Product.code.in_(codes)))
+        for product in result.scalars().all():
+            found[product.code] = _product_to_dict(product)
+    except Exception as e:
+        print(f"Product table lookup failed, falling back to API: {e}")
+        await db.rollback()
+
+    missing = [code for code in codes if code not in found]
+    remote = await asyncio.gather(*(_lookup_remote_barcode(code) for code in missing))
+
+    write_back = []
+    for code, item in zip(missing, remote):
+        if not item:
+            found[code] = None
+            continue
+        item = dict(item)
+        brand = item.pop("brand", None)
+        found[code] = item
+        write_back.append({
+            "code": code,
+            "name": item["name"],
+            "name_normalized": normalize(item["name"])[:300],
+            "brand": brand,
+            "calories": item["calories"],
+            "protein": item["protein"],
+            "fat": item["fat"],
+            "carbs": item["carbs"],
+            "source": "off_api",
+        })
+
+    if write_back:
+        try:
+            async with db.begin_nested():
+                await db.execute(insert(Product).values(write_back).on_conflict_do_nothing())
+        except Exception as e:
+            print(f"Product write-back failed: {e}")
+
+    return {code: found[code] for code in codes}
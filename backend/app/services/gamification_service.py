@@ -1,15 +1,55 @@
 """Gamification service — XP, levels, streaks, achievements."""
 
+from dataclasses import dataclass
 from datetime import date, timedelta
-from typing import Optional
 
-from sqlalchemy import func, select
+from sqlalchemy import Integer, case, cast, func, select, update
+from sqlalchemy.dialects.postgresql import aggregate_order_by, array_agg, insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
 
-from app.models.achievement import ACHIEVEMENT_DEFINITIONS, Achievement
-from app.models.food_log import FoodLog
+from app.core.database import after_commit
+from app.models.achievement import ACHIEVEMENT_BITS, ACHIEVEMENT_DEFINITIONS, Achievement
+from app.models.daily_nutrition import MEAL_BITS
 from app.models.user import User
 from app.models.workout import Workout
+from app.services import leaderboard_service
+from app.services.user_service import data_version_changed, invalidate_user
+
+# Domain events
+FOOD_LOGGED = "food_logged"
+WORKOUT_COMPLETED = "workout_completed"
+WEIGHT_LOGGED = "weight_logged"
+PHOTO_ANALYZED = "photo_analyzed"
+DAILY_BONUS = "daily_bonus"
+
+ALL_MEALS_MASK = MEAL_BITS["breakfast"] | MEAL_BITS["lunch"] | MEAL_BITS["dinner"]
+ALL_MEALS_BONUS_XP = 50
+STREAK_ACHIEVEMENTS = {7: "streak_7", 30: "streak_30", 100: "streak_100"}
+WORKOUT_ACHIEVEMENTS = {10: "workouts_10", 50: "workouts_50", 100: "workouts_100"}
+FIRST_WEEK_DAYS = 7
+GOAL_WEIGHT_TOLERANCE_KG = 0.5
+
+# users columns process_event changes and reads back
+RETURNED_COLUMNS = (
+    "xp", "level", "xp_to_next_level", "streak_days", "max_streak_days", "last_streak_date", "weight_kg",
+    "achievements_mask", "workouts_completed", "photos_analyzed", "logging_days", "data_version",
+)
+
+
+@dataclass
+class GamificationEvent:
+    """
+    One thing the user did, with the facts the rules need.
+    `meal_mask` is the day's rollup mask after a food log (nutrition_service.add_entry),
+    `day` the workout date of a completed workout (weekly leaderboard).
+    """
+
+    kind: str
+    xp: int = 0
+    meal_mask: int | None = None
+    weight_kg: float | None = None
+    day: date | None = None
 
 
 def xp_for_level(level: int) -> int:
@@ -17,138 +57,243 @@ def xp_for_level(level: int) -> int:
     return 500 * (2 ** (level - 1))
 
 
-async def award_xp(db: AsyncSession, user: User, amount: int) -> dict:
+def xp_before_level(level: int) -> int:
+    """Total XP spent reaching `level` from level 1 (sum of xp_for_level below it)."""
+    return 500 * (2 ** (level - 1) - 1)
+
+
+def level_for_total_xp(total_xp: int) -> tuple[int, int]:
     """
-    Award XP to a user. Handle level-ups.
-    Returns dict with xp_awarded, new_level (if leveled up), level_up flag.
+    (level, xp into that level) for a lifetime XP total, in closed form.
+    xp_before_level(L) <= total < xp_before_level(L + 1) solves to
+    L = floor(log2(total / 500 + 1)) + 1, i.e. the bit length of (total + 500) // 500.
     """
-    user.xp += amount
-    leveled_up = False
-    new_level = user.level
+    level = ((total_xp + 500) // 500).bit_length()
+    return level, total_xp - xp_before_level(level)
 
-    while user.xp >= user.xp_to_next_level:
-        user.xp -= user.xp_to_next_level
-        user.level += 1
-        user.xp_to_next_level = xp_for_level(user.level)
-        leveled_up = True
-        new_level = user.level
-
-    # Check level 10 achievement
-    if user.level >= 10:
-        await check_and_award_achievement(db, user, "level_10")
 
+def _streak_values(today: date) -> dict:
+    """SET clause advancing the streak atomically: +1 after yesterday, 1 after a gap."""
+    streak = case(
+        (User.last_streak_date == today, User.streak_days),
+        (User.last_streak_date == today - timedelta(days=1), User.streak_days + 1),
+        else_=1,
+    )
     return {
-        "xp_awarded": amount,
-        "new_level": new_level,
-        "level_up": leveled_up,
-        "current_xp": user.xp,
-        "xp_to_next_level": user.xp_to_next_level,
+        "streak_days": streak,
+        "max_streak_days": func.greatest(func.coalesce(User.max_streak_days, 0), streak),
+        "last_streak_date": today,
+        "logging_days": User.logging_days + case((User.last_streak_date == today, 0), else_=1),
     }
 
 
-async def update_streak(db: AsyncSession, user: User) -> dict:
+def _unlocked_codes(row, event: GamificationEvent, target_weight_kg: float | None) -> list[str]:
+    """Achievement rules over the counters returned by the UPDATE; no queries."""
+    codes = [code for threshold, code in STREAK_ACHIEVEMENTS.items() if row.streak_days >= threshold]
+    codes += [code for threshold, code in WORKOUT_ACHIEVEMENTS.items() if row.workouts_completed >= threshold]
+    if row.photos_analyzed >= 1:
+        codes.append("first_photo")
+    if row.logging_days >= FIRST_WEEK_DAYS:
+        codes.append("first_week")
+    if (
+        event.kind == WEIGHT_LOGGED
+        and target_weight_kg
+        and abs(event.weight_kg - target_weight_kg) <= GOAL_WEIGHT_TOLERANCE_KG
+    ):
+        codes.append("goal_reached")
+    return [code for code in codes if not row.achievements_mask & ACHIEVEMENT_BITS[code]]
+
+
+async def process_event(db: AsyncSession, user: User, event: GamificationEvent) -> dict:
     """
-    Update user's streak. Call when user logs food.
-    Streak increases if user logs food today and last log was yesterday or today.
+    Apply one domain event. A single UPDATE ... RETURNING adds the XP, advances
+    the streak, counters and data version and returns the earned-achievements mask; every rule
+    is then evaluated in memory. Unlocks and level-ups need one more UPDATE and
+    one INSERT into achievements. Returns the XP, level, streak and achievement changes.
     """
-    today = date.today()
-
-    if user.last_streak_date == today:
-        return {"streak_days": user.streak_days, "streak_updated": False}
+    invalidate_user(db, user.id)
+
+    # Everything known up front goes into one atomic UPDATE ... RETURNING;
+    # it also locks the row, so a follow-up write in this transaction is safe
+    xp = event.xp
+    values = {}
+    streak = None
+    all_meals_bonus = None
+    streaked_before = user.last_streak_date
+
+    if event.kind == FOOD_LOGGED:
+        values.update(_streak_values(date.today()))
+        if event.meal_mask is not None and event.meal_mask & ALL_MEALS_MASK == ALL_MEALS_MASK:
+            all_meals_bonus = {"xp_awarded": ALL_MEALS_BONUS_XP}
+            xp += ALL_MEALS_BONUS_XP
+    elif event.kind == WORKOUT_COMPLETED:
+        values["workouts_completed"] = User.workouts_completed + 1
+    elif event.kind == PHOTO_ANALYZED:
+        values["photos_analyzed"] = User.photos_analyzed + 1
+    elif event.kind == WEIGHT_LOGGED:
+        values["weight_kg"] = event.weight_kg
 
-    if user.last_streak_date == today - timedelta(days=1):
-        user.streak_days += 1
-    elif user.last_streak_date is None or (today - user.last_streak_date).days >= 2:
-        user.streak_days = 1
-
-    user.last_streak_date = today
-
-    if user.streak_days > user.max_streak_days:
-        user.max_streak_days = user.streak_days
-
-    # Check streak achievements
-    streak_achievements = {7: "streak_7", 30: "streak_30", 100: "streak_100"}
-    for threshold, code in streak_achievements.items():
-        if user.streak_days >= threshold:
-            await check_and_award_achievement(db, user, code)
-
-    return {"streak_days": user.streak_days, "streak_updated": True}
-
-
-async def check_and_award_achievement(
-    db: AsyncSession, user: User, achievement_code: str
-) -> Optional[dict]:
-    """Check if user already has the achievement, award if not."""
     result = await db.execute(
-        select(Achievement).where(
-            Achievement.user_id == user.id,
-            Achievement.achievement_code == achievement_code,
-        )
+        update(User)
+        .where(User.id == user.id)
+        .values(xp=User.xp + xp, data_version=User.data_version + 1, **values)
+        .returning(*(getattr(User, column) for column in RETURNED_COLUMNS))
     )
-    existing = result.scalar_one_or_none()
-
-    if existing:
-        return None
+    row = result.one()
+    level_before = row.level
+    data_version_changed(db, user.id, row.data_version)
+
+    if event.kind == FOOD_LOGGED:
+        streak = {"streak_days": row.streak_days, "streak_updated": streaked_before != row.last_streak_date}
+
+    new_codes = _unlocked_codes(row, event, user.target_weight_kg)
+    bonus_xp = sum(ACHIEVEMENT_DEFINITIONS[code]["xp"] for code in new_codes)
+    total_xp = xp_before_level(row.level) + row.xp + bonus_xp
+    level, level_xp = level_for_total_xp(total_xp)
+
+    # Level achievements depend on the XP awarded above, so they are checked last
+    if level >= 10 and not row.achievements_mask & ACHIEVEMENT_BITS["level_10"]:
+        new_codes.append("level_10")
+        bonus_xp += ACHIEVEMENT_DEFINITIONS["level_10"]["xp"]
+        level, level_xp = level_for_total_xp(total_xp + ACHIEVEMENT_DEFINITIONS["level_10"]["xp"])
+    xp += bonus_xp
+
+    state = {name: getattr(row, name) for name in RETURNED_COLUMNS}
+    if new_codes or level != row.level:
+        mask = row.achievements_mask
+        for code in new_codes:
+            mask |= ACHIEVEMENT_BITS[code]
+        state.update(xp=level_xp, level=level, xp_to_next_level=xp_for_level(level), achievements_mask=mask)
+        await db.execute(
+            update(User)
+            .where(User.id == user.id)
+            .values(
+                xp=level_xp,
+                level=level,
+                xp_to_next_level=state["xp_to_next_level"],
+                achievements_mask=mask,
+            )
+        )
 
-    definition = ACHIEVEMENT_DEFINITIONS.get(achievement_code)
-    if not definition:
-        return None
+    # Keep the request's User in step without marking it dirty
+    for name, value in state.items():
+        set_committed_value(user, name, value)
 
-    achievement = Achievement(
-        user_id=user.id,
-        achievement_code=achievement_code,
-    )
-    db.add(achievement)
+    if new_codes:
+        await db.execute(
+            insert(Achievement)
+            .values([{"user_id": user.id, "achievement_code": code} for code in new_codes])
+            .on_conflict_do_nothing(constraint="uq_user_achievement")
+        )
 
-    # Award bonus XP for achievement
-    xp_result = await award_xp(db, user, definition["xp"])
+    # Leaderboards only see committed state
+    lifetime_xp = xp_before_level(user.level) + user.xp
+    after_commit(db, lambda: leaderboard_service.record_xp(user.id, lifetime_xp))
+    if streak and streak["streak_updated"]:
+        after_commit(db, lambda: leaderboard_service.record_streak(user.id, row.streak_days, row.last_streak_date))
+    if event.kind == WORKOUT_COMPLETED and event.day is not None:
+        after_commit(db, lambda: leaderboard_service.record_workout(user.id, event.day))
 
     return {
-        "achievement_code": achievement_code,
-        "achievement_name": definition["name"],
-        "achievement_icon": definition["icon"],
-        "xp_awarded": definition["xp"],
+        "xp_awarded": xp,
+        "level": user.level,
+        "level_up": level > level_before,
+        "current_xp": user.xp,
+        "xp_to_next_level": user.xp_to_next_level,
+        "streak": streak,
+        "all_meals_bonus": all_meals_bonus,
+        "achievements": [
+            {
+                "achievement_code": code,
+                "achievement_name": ACHIEVEMENT_DEFINITIONS[code]["name"],
+                "achievement_icon": ACHIEVEMENT_DEFINITIONS[code]["icon"],
+                "xp_awarded": ACHIEVEMENT_DEFINITIONS[code]["xp"],
+            }
+            for code in new_codes
+        ],
     }
 
 
-async def check_daily_meals_bonus(db: AsyncSession, user: User) -> Optional[dict]:
-    """
-    Check if user logged all 3 main meals today → +50 XP bonus.
-    """
-    today = date.today()
-    result = await db.execute(
-        select(FoodLog.meal_type)
-        .where(
-            FoodLog.user_id == user.id,
-            func.date(FoodLog.logged_at) == today,
-        )
-        .distinct()
+async def adjust_workouts_completed(db: AsyncSession, user_id, delta: int, workout_date: date) -> None:
+    """Keep users.workouts_completed and the weekly board in step when a workout is (un)marked completed."""
+    invalidate_user(db, user_id)
+    await db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(workouts_completed=func.greatest(User.workouts_completed + delta, 0))
     )
-    meal_types = {row[0] for row in result.all()}
-
-    required = {"breakfast", "lunch", "dinner"}
-    if required.issubset(meal_types):
-        return await award_xp(db, user, 50)
-
-    return None
+    after_commit(db, lambda: leaderboard_service.record_workout(user_id, workout_date, delta))
 
 
-async def check_workout_achievements(db: AsyncSession, user: User) -> list:
-    """Check workout count achievements."""
-    result = await db.execute(
-        select(func.count(Workout.id)).where(
-            Workout.user_id == user.id,
-            Workout.completed == True,
+def workout_streak_select(user_ids: list | None = None):
+    """
+    Per-user workout streaks from history (gaps and islands): consecutive dates
+    minus their row number are constant within a run, so grouping by that
+    difference yields one row per run. Users without completed workouts are absent.
+    """
+    island = Workout.workout_date - cast(
+        func.row_number().over(partition_by=Workout.user_id, order_by=Workout.workout_date), Integer
+    )
+    days = select(Workout.user_id, Workout.workout_date, island.label("island")).where(Workout.completed.is_(True))
+    if user_ids is not None:
+        days = days.where(Workout.user_id.in_(user_ids))
+    days = days.subquery()
+
+    runs = (
+        select(days.c.user_id, func.count().label("length"), func.max(days.c.workout_date).label("run_end"))
+        .group_by(days.c.user_id, days.c.island)
+        .subquery()
+    )
+    return select(
+        runs.c.user_id,
+        array_agg(aggregate_order_by(runs.c.length, runs.c.run_end.desc()))[1].label("current_workout_streak"),
+        func.max(runs.c.length).label("best_workout_streak"),
+        func.max(runs.c.run_end).label("last_workout_date"),
+    ).group_by(runs.c.user_id)
+
+
+async def refresh_workout_streak(db: AsyncSession, user_id) -> None:
+    """Recompute a user's workout streaks from history."""
+    result = await db.execute(workout_streak_select([user_id]))
+    row = result.one_or_none()
+    await db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(
+            current_workout_streak=row.current_workout_streak if row else 0,
+            best_workout_streak=row.best_workout_streak if row else 0,
+            last_workout_date=row.last_workout_date if row else None,
         )
     )
-    count = result.scalar() or 0
 
-    awarded = []
-    workout_achievements = {10: "workouts_10", 50: "workouts_50", 100: "workouts_100"}
-    for threshold, code in workout_achievements.items():
-        if count >= threshold:
-            result = await check_and_award_achievement(db, user, code)
-            if result:
-                awarded.append(result)
 
-    return awarded
+async def update_workout_streak(db: AsyncSession, user_id, workout_date: date, completed: bool) -> None:
+    """
+    Keep the workout streak columns in step after a workout was saved.
+    Completing a workout on or after last_workout_date extends or restarts the
+    run in one UPDATE; back-dated completions and un-completions are rare and
+    recompute from history.
+    """
+    invalidate_user(db, user_id)
+    if completed:
+        streak = case(
+            (User.last_workout_date == workout_date, User.current_workout_streak),
+            (User.last_workout_date == workout_date - timedelta(days=1), User.current_workout_streak + 1),
+            else_=1,
+        )
+        result = await db.execute(
+            update(User)
+            .where(
+                User.id == user_id,
+                (User.last_workout_date.is_(None)) | (User.last_workout_date <= workout_date),
+            )
+            .values(
+                current_workout_streak=streak,
+                best_workout_streak=func.greatest(User.best_workout_streak, streak),
+                last_workout_date=workout_date,
+            )
+            .returning(User.id)
+        )
+        if result.first() is not None:
+            return
+    await refresh_workout_streak(db, user_id)
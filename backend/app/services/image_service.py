@@ -0,0 +1,107 @@
+"""Image service — validate and shrink food photos before they go to the vision model."""
+
+import asyncio
+import io
+from concurrent.futures import ProcessPoolExecutor
+
+from app.core.config import get_settings
+
+try:
+    from PIL import Image, ImageOps, UnidentifiedImageError
+except ImportError:  # Pillow is optional; uploads are then only sniffed and sent as-is
+    Image = None
+
+settings = get_settings()
+
+# Leading bytes of the formats the vision API accepts
+MAGIC_NUMBERS = {
+    b"\xff\xd8\xff": "image/jpeg",
+    b"\x89PNG\r\n\x1a\n": "image/png",
+    b"GIF8": "image/gif",
+}
+PIL_FORMATS = {"JPEG", "PNG", "WEBP", "GIF", "MPO"}
+OUTPUT_MIME_TYPES = {"JPEG": "image/jpeg", "WEBP": "image/webp"}
+
+_pool: ProcessPoolExecutor | None = None
+
+
+class InvalidImageError(ValueError):
+    """The upload is not an image type we can analyze."""
+
+
+def sniff_mime_type(data: bytes) -> str:
+    for magic, mime_type in MAGIC_NUMBERS.items():
+        if data.startswith(magic):
+            return mime_type
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    raise InvalidImageError("Unsupported image type")
+
+
+def dhash(image) -> int:
+    """64-bit difference hash: brightness gradients of a 9x8 grayscale thumbnail."""
+    pixels = list(image.convert("L").resize((9, 8), Image.LANCZOS).getdata())
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            offset = row * 9 + col
+            bits = (bits << 1) | (pixels[offset] < pixels[offset + 1])
+    return bits
+
+
+def preprocess_image(data: bytes, max_side: int, fmt: str, quality: int) -> tuple[bytes, str, int | None]:
+    """
+    Decode, apply the EXIF orientation, downscale to `max_side` and re-encode
+    without metadata. Also returns the perceptual hash of the result.
+    Runs in a worker process.
+    """
+    if Image is None:
+        return data, sniff_mime_type(data), None
+
+    try:
+        image = Image.open(io.BytesIO(data))
+        if image.format not in PIL_FORMATS:
+            raise InvalidImageError("Unsupported image type")
+        # JPEG can decode at 1/2, 1/4 or 1/8 scale directly, which skips most of the work
+        image.draft("RGB", (max_side, max_side))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        raise InvalidImageError("Cannot decode image")
+
+    fmt = fmt.upper() if fmt.upper() in OUTPUT_MIME_TYPES else "JPEG"
+    out = io.BytesIO()
+    image.save(out, format=fmt, quality=quality)
+    return out.getvalue(), OUTPUT_MIME_TYPES[fmt], dhash(image)
+
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=settings.IMAGE_PROCESS_WORKERS)
+    return _pool
+
+
+def close_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+async def prepare_photo(data: bytes) -> tuple[bytes, str, int | None]:
+    """Preprocessed image bytes, MIME type and perceptual hash, computed off the event loop."""
+    if Image is None:
+        return data, sniff_mime_type(data), None
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_pool(),
+        preprocess_image,
+        data,
+        settings.IMAGE_MAX_SIDE,
+        settings.IMAGE_OUTPUT_FORMAT,
+        settings.IMAGE_QUALITY,
+    )
@@ -0,0 +1,212 @@
+"""Leaderboard service — Redis sorted sets with an in-process snapshot fallback."""
+
+import asyncio
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.core.redis import get_redis
+from app.models.user import User
+from app.models.workout import Workout
+
+settings = get_settings()
+
+XP = "xp"
+STREAK = "streak"
+WORKOUTS_WEEK = "workouts_week"
+BOARDS = (XP, STREAK, WORKOUTS_WEEK)
+
+# Lifetime XP (users.xp only holds progress into the current level); see gamification_service.xp_before_level
+LIFETIME_XP = 500 * (func.power(2, User.level - 1) - 1) + User.xp
+
+
+def week_key(day: date) -> str:
+    year, week, _ = day.isocalendar()
+    return f"lb:{WORKOUTS_WEEK}:{year}-W{week:02d}"
+
+
+def streak_key(day: date) -> str:
+    return f"lb:{STREAK}:{day.isoformat()}"
+
+
+async def _publish(commands) -> None:
+    redis = get_redis()
+    if redis is None:
+        return
+    try:
+        pipe = redis.pipeline(transaction=False)
+        commands(pipe)
+        await pipe.execute()
+    except Exception as e:
+        print(f"⚠️ Leaderboard update failed: {e}")
+
+
+async def record_xp(user_id, lifetime_xp: int) -> None:
+    await _publish(lambda pipe: pipe.zadd(f"lb:{XP}", {str(user_id): lifetime_xp}))
+
+
+async def record_streak(user_id, streak_days: int, day: date) -> None:
+    # A streak stays alive while the user logged today or yesterday, so it is
+    # filed under the day it was extended and old days simply expire
+    def commands(pipe):
+        pipe.zadd(streak_key(day), {str(user_id): streak_days})
+        pipe.expire(streak_key(day), 3 * 86400)
+
+    await _publish(commands)
+
+
+async def record_workout(user_id, workout_date: date, delta: int = 1) -> None:
+    def commands(pipe):
+        pipe.zincrby(week_key(workout_date), delta, str(user_id))
+        pipe.expire(week_key(workout_date), 15 * 86400)
+
+    await _publish(commands)
+
+
+async def _redis_board_key(redis, board: str) -> str:
+    """Sorted set holding `board` right now; the streak board is a short-lived union."""
+    today = date.today()
+    if board == XP:
+        return f"lb:{XP}"
+    if board == WORKOUTS_WEEK:
+        return week_key(today)
+
+    key = f"lb:{STREAK}:active:{today.isoformat()}"
+    if not await redis.exists(key):
+        await redis.zunionstore(key, [streak_key(today), streak_key(today - timedelta(days=1))], aggregate="MAX")
+        await redis.expire(key, settings.LEADERBOARD_SNAPSHOT_TTL)
+    return key
+
+
+class LeaderboardSnapshot:
+    """
+    Ranked (user_id, score) list built from Postgres, used while Redis is
+    unavailable. Rebuilt at most every LEADERBOARD_SNAPSHOT_TTL seconds.
+    """
+
+    def __init__(self, board: str):
+        self.board = board
+        self.entries: list[tuple[str, float]] = []
+        self.ranks: dict[str, int] = {}
+        self.built_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def query(self):
+        today = date.today()
+        if self.board == XP:
+            return select(User.id, LIFETIME_XP).order_by(LIFETIME_XP.desc(), User.id)
+        if self.board == STREAK:
+            return (
+                select(User.id, User.streak_days)
+                .where(User.last_streak_date >= today - timedelta(days=1), User.streak_days > 0)
+                .order_by(User.streak_days.desc(), User.id)
+            )
+        week_start = today - timedelta(days=today.weekday())
+        count = func.count()
+        return (
+            select(Workout.user_id, count)
+            .where(
+                Workout.completed.is_(True),
+                Workout.workout_date >= week_start,
+                Workout.workout_date < week_start + timedelta(days=7),
+            )
+            .group_by(Workout.user_id)
+            .order_by(count.desc(), Workout.user_id)
+        )
+
+    async def refresh(self, db: AsyncSession) -> None:
+        if time.monotonic() - self.built_at < settings.LEADERBOARD_SNAPSHOT_TTL:
+            return
+        async with self._lock:
+            if time.monotonic() - self.built_at < settings.LEADERBOARD_SNAPSHOT_TTL:
+                return
+            result = await db.execute(self.query())
+            # Postgres already sorted the rows; indexing a million of them still
+            # takes long enough that it should not block the event loop
+            self.entries, self.ranks = await asyncio.to_thread(self._index, result.all())
+            self.built_at = time.monotonic()
+
+    @staticmethod
+    def _index(rows) -> tuple[list[tuple[str, float]], dict[str, int]]:
+        entries = [(str(user_id), float(score)) for user_id, score in rows]
+        return entries, {user_id: index for index, (user_id, _) in enumerate(entries)}
+
+
+_snapshots = {board: LeaderboardSnapshot(board) for board in BOARDS}
+
+
+async def get_page(db: AsyncSession, board: str, offset: int, limit: int) -> list[tuple[int, str, float]]:
+    """(rank, user_id, score) for ranks offset+1 .. offset+limit, best first."""
+    redis = get_redis()
+    if redis is not None:
+        try:
+            key = await _redis_board_key(redis, board)
+            rows = await redis.zrevrange(key, offset, offset + limit - 1, withscores=True)
+            return [(offset + i + 1, member.decode(), score) for i, (member, score) in enumerate(rows)]
+        except Exception as e:
+            print(f"⚠️ Leaderboard read failed, using snapshot: {e}")
+
+    snapshot = _snapshots[board]
+    await snapshot.refresh(db)
+    return [
+        (offset + i + 1, user_id, score)
+        for i, (user_id, score) in enumerate(snapshot.entries[offset:offset + limit])
+    ]
+
+
+async def get_ranks(db: AsyncSession, board: str, user_ids: list[str]) -> dict[str, tuple[int, float] | None]:
+    """Global (rank, score) per user id; None for users not on the board."""
+    redis = get_redis()
+    if redis is not None:
+        try:
+            key = await _redis_board_key(redis, board)
+            pipe = redis.pipeline(transaction=False)
+            for user_id in user_ids:
+                pipe.zrevrank(key, user_id)
+                pipe.zscore(key, user_id)
+            replies = await pipe.execute()
+            return {
+                user_id: (replies[2 * i] + 1, replies[2 * i + 1]) if replies[2 * i] is not None else None
+                for i, user_id in enumerate(user_ids)
+            }
+        except Exception as e:
+            print(f"⚠️ Leaderboard read failed, using snapshot: {e}")
+
+    snapshot = _snapshots[board]
+    await snapshot.refresh(db)
+    ranks = {}
+    for user_id in user_ids:
+        index = snapshot.ranks.get(user_id)
+        ranks[user_id] = (index + 1, snapshot.entries[index][1]) if index is not None else None
+    return ranks
+
+
+async def rebuild(db: AsyncSession, batch_size: int = 10_000) -> dict[str, int]:
+    """Reload every Redis board from Postgres (initial fill or after a Redis flush)."""
+    redis = get_redis()
+    if redis is None:
+        raise RuntimeError("Redis is not configured")
+
+    today = date.today()
+    keys = {XP: f"lb:{XP}", STREAK: streak_key(today), WORKOUTS_WEEK: week_key(today)}
+    counts = {}
+    for board in BOARDS:
+        snapshot = LeaderboardSnapshot(board)
+        result = await db.stream(snapshot.query())
+        staging = f"{keys[board]}:rebuild"
+        await redis.delete(staging)
+        counts[board] = 0
+        async for rows in result.partitions(batch_size):
+            await redis.zadd(staging, {str(user_id): float(score) for user_id, score in rows})
+            counts[board] += len(rows)
+        if counts[board]:
+            await redis.rename(staging, keys[board])
+            if board != XP:
+                await redis.expire(keys[board], 15 * 86400)
+        else:
+            await redis.delete(keys[board])
+    await redis.delete(f"lb:{STREAK}:active:{today.isoformat()}", streak_key(today - timedelta(days=1)))
+    return counts
@@ -0,0 +1,123 @@
+"""Nutrition service — incremental daily_nutrition rollup over food_log."""
+
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import case, delete, func, literal, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.daily_nutrition import MEAL_BITS, DailyNutrition
+from app.models.food_log import FoodLog
+
+MACRO_FIELDS = ("calories", "protein_g", "fat_g", "carbs_g")
+
+
+def meal_bit(meal_type: str | None) -> int:
+    """MEAL_BITS bit for a meal type; unknown types set no bit."""
+    return MEAL_BITS.get(meal_type or "", 0)
+
+
+def meal_bit_expr():
+    """SQL expression mapping FoodLog.meal_type to its MEAL_BITS bit."""
+    return case(
+        *((FoodLog.meal_type == meal, bit) for meal, bit in MEAL_BITS.items()),
+        else_=0,
+    )
+
+
+def day_range(day: date) -> tuple[datetime, datetime]:
+    """Half-open [start, end) logged_at range for a calendar day."""
+    start = datetime.combine(day, time.min)
+    return start, start + timedelta(days=1)
+
+
+async def add_entry(db: AsyncSession, user_id, day, entry: FoodLog) -> int:
+    """
+    Add a new food_log entry to its day's rollup (single upsert).
+    `day` may be a date or a SQL expression such as func.current_date().
+    Returns the day's meal mask after the entry.
+    """
+    values = {field: getattr(entry, field) or 0 for field in MACRO_FIELDS}
+    stmt = insert(DailyNutrition).values(
+        user_id=user_id,
+        day=day,
+        entry_count=1,
+        meal_mask=meal_bit(entry.meal_type),
+        **values,
+    )
+    result = await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[DailyNutrition.user_id, DailyNutrition.day],
+            set_={
+                **{field: getattr(DailyNutrition, field) + stmt.excluded[field] for field in MACRO_FIELDS},
+                "entry_count": DailyNutrition.entry_count + 1,
+                "meal_mask": DailyNutrition.meal_mask.op("|")(stmt.excluded.meal_mask),
+                "updated_at": func.now(),
+            },
+        ).returning(DailyNutrition.meal_mask)
+    )
+    return result.scalar_one()
+
+
+async def apply_delta(
+    db: AsyncSession, user_id, day: date, deltas: dict, count_delta: int = 0, recompute_mask: bool = False
+) -> None:
+    """
+    Shift an existing day's totals by `deltas` after an entry was changed or removed.
+    The meal mask cannot be un-ORed, so it is recomputed from food_log when needed
+    (call after flushing the food_log change). Rows left with no entries are removed.
+    """
+    values = {
+        field: getattr(DailyNutrition, field) + literal(deltas.get(field, 0) or 0)
+        for field in MACRO_FIELDS
+    }
+    values["entry_count"] = DailyNutrition.entry_count + count_delta
+    values["updated_at"] = func.now()
+
+    if recompute_mask:
+        start, end = day_range(day)
+        values["meal_mask"] = (
+            select(func.coalesce(func.bit_or(meal_bit_expr()), 0))
+            .where(FoodLog.user_id == user_id, FoodLog.logged_at >= start, FoodLog.logged_at < end)
+            .scalar_subquery()
+        )
+
+    await db.execute(
+        update(DailyNutrition)
+        .where(DailyNutrition.user_id == user_id, DailyNutrition.day == day)
+        .values(**values)
+    )
+    if count_delta < 0:
+        await db.execute(
+            delete(DailyNutrition).where(
+                DailyNutrition.user_id == user_id,
+                DailyNutrition.day == day,
+                DailyNutrition.entry_count <= 0,
+            )
+        )
+
+
+async def get_day(db: AsyncSession, user_id, day: date) -> DailyNutrition | None:
+    result = await db.execute(
+        select(DailyNutrition).where(DailyNutrition.user_id == user_id, DailyNutrition.day == day)
+    )
+    return result.scalar_one_or_none()
+
+
+def rollup_select():
+    """food_log aggregated per (user_id, day) — the ground truth for the rollup."""
+    day = func.date(FoodLog.logged_at)
+    return (
+        select(
+            FoodLog.user_id.label("user_id"),
+            day.label("day"),
+            func.sum(FoodLog.calories).label("calories"),
+            func.coalesce(func.sum(FoodLog.protein_g), 0).label("protein_g"),
+            func.coalesce(func.sum(FoodLog.fat_g), 0).label("fat_g"),
+            func.coalesce(func.sum(FoodLog.carbs_g), 0).label("carbs_g"),
+            func.count().label("entry_count"),
+            func.coalesce(func.bit_or(meal_bit_expr()), 0).label("meal_mask"),
+        )
+        .where(FoodLog.logged_at.is_not(None))
+        .group_by(FoodLog.user_id, day)
+    )
@@ -0,0 +1,130 @@
+"""Photo cache — reuse analysis results for identical and near-duplicate photos."""
+
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+class MultiIndexHash:
+    """
+    Hamming-radius search over 64-bit perceptual hashes (multi-index hashing).
+
+    The hash is split into `max_distance + 1` chunks, each with its own exact
+    lookup table. Two hashes within `max_distance` bits must agree exactly on at
+    least one chunk (pigeonhole), so a query only checks the keys sharing a
+    chunk with it instead of scanning every entry.
+    """
+
+    def __init__(self, max_distance: int, bits: int = 64):
+        self.max_distance = max_distance
+        parts = max_distance + 1
+        self._chunks = []  # (shift, mask) per chunk
+        shift = 0
+        for part in range(parts):
+            width = bits // parts + (1 if part < bits % parts else 0)
+            self._chunks.append((shift, (1 << width) - 1))
+            shift += width
+        self._tables: list[dict[int, set[str]]] = [{} for _ in self._chunks]
+        self._hashes: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def add(self, phash: int, key: str) -> None:
+        self.remove(key)
+        self._hashes[key] = phash
+        for table, (shift, mask) in zip(self._tables, self._chunks):
+            table.setdefault((phash >> shift) & mask, set()).add(key)
+
+    def remove(self, key: str) -> None:
+        phash = self._hashes.pop(key, None)
+        if phash is None:
+            return
+        for table, (shift, mask) in zip(self._tables, self._chunks):
+            chunk = (phash >> shift) & mask
+            keys = table[chunk]
+            keys.discard(key)
+            if not keys:
+                del table[chunk]
+
+    def search(self, phash: int) -> list[tuple[int, str]]:
+        """(distance, key) pairs within max_distance, closest first."""
+        candidates = set()
+        for table, (shift, mask) in zip(self._tables, self._chunks):
+            candidates.update(table.get((phash >> shift) & mask, ()))
+        found = []
+        for key in candidates:
+            distance = hamming(phash, self._hashes[key])
+            if distance <= self.max_distance:
+                found.append((distance, key))
+        found.sort()
+        return found
+
+
+@dataclass
+class PhotoCacheStats:
+    exact_hits: int = 0
+    similar_hits: int = 0
+    misses: int = 0
+    entries: int = 0
+
+    def as_dict(self) -> dict:
+        data = asdict(self)
+        lookups = self.exact_hits + self.similar_hits + self.misses
+        data["hit_rate"] = round((self.exact_hits + self.similar_hits) / lookups, 3) if lookups else 0.0
+        return data
+
+
+class PhotoResultCache:
+    """
+    In-process cache keyed by the exact content hash, with a multi-index over
+    perceptual hashes for near-duplicate lookups. All entries share one TTL.
+    """
+
+    def __init__(self, ttl: float, max_distance: int, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.stats = PhotoCacheStats()
+        self._entries: OrderedDict[str, tuple[dict, float]] = OrderedDict()
+        self._index = MultiIndexHash(max_distance)
+
+    def get(self, content_hash: str, phash: int | None) -> dict | None:
+        now = time.time()
+        entry = self._entries.get(content_hash)
+        if entry is not None and entry[1] > now:
+            self.stats.exact_hits += 1
+            return entry[0]
+
+        if phash is not None:
+            for _, key in self._index.search(phash):
+                entry = self._entries[key]
+                if entry[1] > now:
+                    self.stats.similar_hits += 1
+                    return entry[0]
+
+        self.stats.misses += 1
+        return None
+
+    def set(self, content_hash: str, phash: int | None, result: dict) -> None:
+        self._entries.pop(content_hash, None)
+        self._entries[content_hash] = (result, time.time() + self.ttl)
+        if phash is not None:
+            self._index.add(phash, content_hash)
+        else:
+            self._index.remove(content_hash)
+        self._evict()
+        self.stats.entries = len(self._entries)
+
+    def _evict(self) -> None:
+        now = time.time()
+        # Insertion order is expiry order, so expired entries lead
+        while self._entries:
+            key, (_, expires_at) = next(iter(self._entries.items()))
+            if expires_at > now and len(self._entries) <= self.max_entries:
+                break
+            del self._entries[key]
+            self._index.remove(key)
@@ -0,0 +1,263 @@
+"""Photo jobs — bounded background worker pool for AI photo analysis."""
+
+import asyncio
+import json
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import Awaitable, Callable
+
+from app.core.config import get_settings
+from app.core.database import session_scope
+from app.core.redis import get_redis
+from app.services import ai_service
+from app.services.circuit_breaker import CircuitOpenError
+from app.services.gamification_service import PHOTO_ANALYZED, GamificationEvent, process_event
+from app.services.user_service import load_user
+
+settings = get_settings()
+
+PHOTO_ANALYSIS_XP = 15
+
+
+class QueueFullError(Exception):
+    """The job queue is at capacity; the client should retry later."""
+
+
+@dataclass
+class PhotoJobStats:
+    submitted: int = 0
+    cached: int = 0
+    rejected: int = 0
+    completed: int = 0
+    failed: int = 0
+    timed_out: int = 0
+    queued: int = 0
+    running: int = 0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass
+class PhotoJob:
+    user_id: str
+    image_bytes: bytes
+    mime_type: str
+    phash: int | None = None
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: str = "queued"  # queued | running | done | failed | timeout
+    result: dict | None = None
+    error: str | None = None
+    retry_after: float | None = None  # seconds until the OpenAI breaker lets calls through
+    created_at: float = field(default_factory=time.time)
+    finished_at: float | None = None
+    done: asyncio.Event = field(default_factory=asyncio.Event)
+
+    def to_redis(self) -> str:
+        return json.dumps(
+            {
+                "user_id": self.user_id,
+                "status": self.status,
+                "result": self.result,
+                "error": self.error,
+                "retry_after": self.retry_after,
+            }
+        )
+
+    @classmethod
+    def from_redis(cls, job_id: str, raw: bytes) -> "PhotoJob":
+        data = json.loads(raw)
+        return cls(
+            user_id=data["user_id"],
+            image_bytes=b"",
+            mime_type="",
+            id=job_id,
+            status=data["status"],
+            result=data["result"],
+            error=data["error"],
+            retry_after=data.get("retry_after"),
+        )
+
+    def as_dict(self) -> dict:
+        data = {"job_id": self.id, "status": self.status}
+        if self.result is not None:
+            data["result"] = self.result
+        if self.error is not None:
+            data["error"] = self.error
+        if self.retry_after is not None:
+            data["retry_after"] = max(1, round(self.retry_after))
+        return data
+
+
+class PhotoJobQueue:
+    """
+    Fixed pool of workers draining a bounded queue.
+
+    `submit` never waits: a full queue raises QueueFullError so the router can
+    answer 429. Each job runs under its own timeout, and finished jobs are kept
+    for `result_ttl` seconds for polling.
+
+    Jobs run in the process that accepted them. Their status and results are
+    mirrored to Redis so a poll can be answered by any worker; without Redis,
+    polling only works when the API runs as a single process.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[PhotoJob], Awaitable[dict]],
+        max_concurrency: int,
+        max_queue: int,
+        job_timeout: float,
+        result_ttl: float,
+    ):
+        self.handler = handler
+        self.max_concurrency = max_concurrency
+        self.job_timeout = job_timeout
+        self.result_ttl = result_ttl
+        self.stats = PhotoJobStats()
+        self._queue: asyncio.Queue[PhotoJob] = asyncio.Queue(maxsize=max_queue)
+        self._jobs: dict[str, PhotoJob] = {}
+        self._workers: list[asyncio.Task] = []
+
+    def start(self) -> None:
+        if not self._workers:
+            self._workers = [
+                asyncio.create_task(self._worker()) for _ in range(self.max_concurrency)
+            ]
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def submit(self, user_id, image_bytes: bytes, mime_type: str, phash: int | None = None) -> PhotoJob:
+        self._purge()
+        job = PhotoJob(user_id=str(user_id), image_bytes=image_bytes, mime_type=mime_type, phash=phash)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.stats.rejected += 1
+            raise QueueFullError()
+        self._jobs[job.id] = job
+        self.stats.submitted += 1
+        self.stats.queued = self._queue.qsize()
+        await self._publish(job)
+        return job
+
+    async def finished(self, user_id, result: dict) -> PhotoJob:
+        """Record a job that was answered without running (e.g. from cache)."""
+        self._purge()
+        job = PhotoJob(user_id=str(user_id), image_bytes=b"", mime_type="", status="done", result=result)
+        job.finished_at = job.created_at
+        job.done.set()
+        self._jobs[job.id] = job
+        self.stats.cached += 1
+        await self._publish(job)
+        return job
+
+    async def get(self, job_id: str, user_id) -> PhotoJob | None:
+        """A job owned by `user_id`, or None if unknown, expired or someone else's."""
+        job = self._jobs.get(job_id)
+        if job is None:
+            job = await self._fetch(job_id)
+        if job is None or job.user_id != str(user_id):
+            return None
+        return job
+
+    async def _publish(self, job: PhotoJob) -> None:
+        redis = get_redis()
+        if redis is None:
+            return
+        # Unfinished jobs must outlive their queue wait and timeout
+        ttl = self.result_ttl if job.finished_at is not None else self.result_ttl + self.job_timeout * 2
+        try:
+            await redis.set(f"photo_job:{job.id}", job.to_redis(), ex=int(ttl))
+        except Exception as e:
+            print(f"⚠️ Photo job {job.id} state not shared: {e}")
+
+    async def _fetch(self, job_id: str) -> PhotoJob | None:
+        redis = get_redis()
+        if redis is None:
+            return None
+        try:
+            raw = await redis.get(f"photo_job:{job_id}")
+        except Exception:
+            return None
+        return PhotoJob.from_redis(job_id, raw) if raw is not None else None
+
+    async def wait(self, job: PhotoJob) -> PhotoJob:
+        await job.done.wait()
+        return job
+
+    def _purge(self) -> None:
+        cutoff = time.time() - self.result_ttl
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished_at is not None and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            self.stats.queued = self._queue.qsize()
+            self.stats.running += 1
+            job.status = "running"
+            try:
+                await self._publish(job)
+                job.result = await asyncio.wait_for(self.handler(job), self.job_timeout)
+                job.status = "done"
+                self.stats.completed += 1
+            except asyncio.TimeoutError:
+                job.status = "timeout"
+                job.error = "Analysis timed out"
+                self.stats.timed_out += 1
+            except CircuitOpenError as e:
+                job.status = "failed"
+                job.error = "Photo analysis is temporarily unavailable"
+                job.retry_after = e.retry_after
+                self.stats.failed += 1
+            except asyncio.CancelledError:
+                job.status = "failed"
+                job.error = "Server shutting down"
+                raise
+            except Exception as e:
+                print(f"⚠️ Photo job {job.id} failed: {e}")
+                job.status = "failed"
+                job.error = "Analysis failed"
+                self.stats.failed += 1
+            finally:
+                # The upload is no longer needed once the job has run
+                job.image_bytes = b""
+                job.finished_at = time.time()
+                job.done.set()
+                self.stats.running -= 1
+                self._queue.task_done()
+            await self._publish(job)
+
+
+async def reward_analysis(user_id) -> None:
+    """Award photo analysis XP in a short transaction of its own."""
+    async with session_scope() as db:
+        user = await load_user(db, user_id)
+        if user:
+            await process_event(db, user, GamificationEvent(PHOTO_ANALYZED, xp=PHOTO_ANALYSIS_XP))
+
+
+async def _analyze_and_reward(job: PhotoJob) -> dict:
+    """Call OpenAI with no DB session open, then award XP."""
+    result = await ai_service.analyze_food_photo(job.image_bytes, job.mime_type, job.phash)
+    await reward_analysis(job.user_id)
+    return result
+
+
+photo_jobs = PhotoJobQueue(
+    _analyze_and_reward,
+    max_concurrency=settings.PHOTO_JOB_WORKERS,
+    max_queue=settings.PHOTO_JOB_QUEUE_SIZE,
+    job_timeout=settings.PHOTO_JOB_TIMEOUT,
+    result_ttl=settings.PHOTO_JOB_RESULT_TTL,
+)
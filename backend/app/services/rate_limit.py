@@ -0,0 +1,180 @@
+"""Rate limiting — per-user token buckets in Redis with an in-process fallback."""
+
+import math
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+
+from fastapi import Depends, HTTPException, Response
+
+from app.core.redis import get_redis
+from app.models.user import User
+from app.services.subscription_service import get_subscription_status
+from app.services.user_service import get_cached_user
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+# Refill and take in one atomic step. Redis' own clock is used so every app
+# instance agrees on elapsed time. Floats are returned as strings because
+# Lua numbers are truncated to integers in replies.
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+    tokens = math.min(capacity, tokens - cost)
+    allowed = 1
+else
+    retry_after = (cost - tokens) / rate
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(retry_after), tostring(tokens)}
+"""
+
+
+@dataclass(frozen=True)
+class RateLimitPolicy:
+    """`capacity` requests, refilled evenly over `period` seconds."""
+
+    capacity: int
+    period: float
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.period
+
+    @classmethod
+    def parse(cls, spec: str) -> "RateLimitPolicy":
+        """Parse "10/hour", "5/minute" or "100/86400"."""
+        count, _, period = spec.partition("/")
+        seconds = PERIODS.get(period.strip()) or float(period)
+        return cls(capacity=int(count), period=seconds)
+
+
+@dataclass
+class RateLimitStats:
+    allowed: int = 0
+    limited: int = 0
+    refunded: int = 0
+    local_fallbacks: int = 0
+    redis_errors: int = 0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass
+class RateLimitResult:
+    allowed: bool
+    remaining: int
+    retry_after: float
+
+
+class RateLimiter:
+    """
+    Token-bucket limiter for one route, with a policy per subscription tier
+    ("default" applies to tiers without their own policy).
+
+    Used as a FastAPI dependency it limits the authenticated user and raises
+    429 with Retry-After; `charge` does the same from inside a route, for
+    routes that should only spend a token once the request is accepted.
+    Without Redis, or when Redis errors, buckets are kept per process —
+    limits then apply per instance.
+    """
+
+    def __init__(self, name: str, policies: dict[str, str], max_local_buckets: int = 50_000):
+        self.name = name
+        self.policies = {tier: RateLimitPolicy.parse(spec) for tier, spec in policies.items()}
+        self.max_local_buckets = max_local_buckets
+        self.stats = RateLimitStats()
+        self._local: OrderedDict[str, tuple[float, float]] = OrderedDict()  # key -> (tokens, ts)
+        self._scripts: dict[int, object] = {}
+
+    def policy_for(self, tier: str) -> RateLimitPolicy:
+        return self.policies.get(tier) or self.policies["default"]
+
+    async def hit(self, key: str, tier: str = "default", cost: int = 1) -> RateLimitResult:
+        policy = self.policy_for(tier)
+        result = await self._hit_redis(key, policy, cost)
+        if result is None:
+            result = self._hit_local(key, policy, cost)
+
+        if result.allowed:
+            self.stats.allowed += 1
+        else:
+            self.stats.limited += 1
+        return result
+
+    async def refund(self, key: str, tier: str = "default", cost: int = 1) -> None:
+        """Give back tokens for a request that was rejected after it was charged."""
+        policy = self.policy_for(tier)
+        if await self._hit_redis(key, policy, -cost) is None:
+            self._hit_local(key, policy, -cost)
+        self.stats.refunded += 1
+
+    async def _hit_redis(self, key: str, policy: RateLimitPolicy, cost: int) -> RateLimitResult | None:
+        redis = get_redis()
+        if redis is None:
+            return None
+        script = self._scripts.get(id(redis))
+        if script is None:
+            script = self._scripts[id(redis)] = redis.register_script(TOKEN_BUCKET_LUA)
+        try:
+            allowed, retry_after, tokens = await script(
+                keys=[f"ratelimit:{self.name}:{key}"],
+                args=[policy.capacity, policy.rate, cost],
+            )
+        except Exception:
+            self.stats.redis_errors += 1
+            return None
+        return RateLimitResult(bool(allowed), int(float(tokens)), float(retry_after))
+
+    def _hit_local(self, key: str, policy: RateLimitPolicy, cost: int) -> RateLimitResult:
+        self.stats.local_fallbacks += 1
+        now = time.monotonic()
+        tokens, ts = self._local.get(key, (policy.capacity, now))
+        tokens = min(policy.capacity, tokens + (now - ts) * policy.rate)
+
+        allowed = tokens >= cost
+        retry_after = 0.0
+        if allowed:
+            tokens = min(policy.capacity, tokens - cost)
+        else:
+            retry_after = (cost - tokens) / policy.rate
+
+        self._local[key] = (tokens, now)
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_local_buckets:
+            self._local.popitem(last=False)
+        return RateLimitResult(allowed, int(tokens), retry_after)
+
+    async def __call__(self, response: Response, user: User = Depends(get_cached_user)) -> None:
+        await self.charge(user, response)
+
+    async def charge(self, user: User, response: Response | None = None) -> None:
+        """Spend one of the user's tokens or raise 429."""
+        tier = get_subscription_status(user)["status"]
+        result = await self.hit(str(user.id), tier)
+        if not result.allowed:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests, try again later",
+                headers={"Retry-After": str(max(1, math.ceil(result.retry_after)))},
+            )
+        if response is not None:
+            response.headers["X-RateLimit-Remaining"] = str(result.remaining)
+
+    async def refund_user(self, user: User) -> None:
+        await self.refund(str(user.id), get_subscription_status(user)["status"])
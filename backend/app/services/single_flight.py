@@ -0,0 +1,52 @@
+"""Single-flight — coalesce concurrent calls for the same key into one."""
+
+import asyncio
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable
+
+
+@dataclass
+class SingleFlightStats:
+    calls: int = 0
+    executions: int = 0
+    coalesced: int = 0
+    in_flight: int = 0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+class SingleFlight:
+    """
+    Concurrent callers with the same key await one shared task.
+
+    The task is shielded, so a caller that is cancelled (e.g. the client
+    disconnected) does not cancel the work the other callers are waiting on.
+    Results are not retained once the task finishes — pair with a cache.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.stats = SingleFlightStats()
+        self._tasks: dict[str, asyncio.Task] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self.stats.calls += 1
+        task = self._tasks.get(key)
+        if task is None:
+            self.stats.executions += 1
+            task = asyncio.ensure_future(fn())
+            self._tasks[key] = task
+            self.stats.in_flight = len(self._tasks)
+            task.add_done_callback(lambda _: self._forget(key, task))
+        else:
+            self.stats.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        self.stats.in_flight = len(self._tasks)
+        # Retrieve the exception so an orphaned failure is not logged as unhandled
+        if not task.cancelled():
+            task.exception()
@@ -8,11 +8,13 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.subscription import Subscription
 from app.models.user import User
+from app.services.user_service import bump_data_version, invalidate_user
 
 
 async def start_trial(db: AsyncSession, user: User) -> dict:
     """Start 7-day trial for a new user."""
     now = datetime.now(timezone.utc)
+    invalidate_user(db, user.id)
     user.trial_started_at = now
     user.subscription_status = "trial"
     user.subscription_expires_at = now + timedelta(days=7)
@@ -42,6 +44,7 @@ async def activate_subscription(
     )
     db.add(subscription)
 
+    await bump_data_version(db, user.id)
     user.subscription_status = "active"
     user.subscription_expires_at = expires_at
 
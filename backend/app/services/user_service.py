@@ -0,0 +1,226 @@
+"""User service — request-scoped user loading, the profile cache and data versions."""
+
+import hashlib
+import time
+import uuid
+from datetime import date, datetime
+
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy import Date, DateTime, select, update
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.auth import get_current_user_id
+from app.core.config import get_settings
+from app.core.database import after_commit, async_session_factory, get_db
+from app.core.redis import get_redis
+from app.models.user import User
+from app.services.cache import TwoTierCache
+
+settings = get_settings()
+
+# Profile snapshots for read-only endpoints (spec: Redis, TTL 5 min)
+profile_cache = TwoTierCache(
+    "user_profile",
+    ttl=settings.USER_PROFILE_CACHE_TTL,
+    negative_ttl=5,
+    max_entries=settings.USER_PROFILE_CACHE_MAX_ENTRIES,
+)
+
+_COLUMNS = User.__table__.columns
+
+# Versions only move forward, so a reader that loaded an old value from
+# Postgres can never overwrite a newer one published by a writer
+SET_IF_GREATER_LUA = """
+local current = tonumber(redis.call('GET', KEYS[1]) or '-1')
+if tonumber(ARGV[1]) > current then
+    redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+    return 1
+end
+return 0
+"""
+_set_if_greater: dict[int, object] = {}
+
+
+def user_to_cache(user: User) -> dict:
+    """JSON-safe snapshot of every users column."""
+    data = {}
+    for column in _COLUMNS:
+        value = getattr(user, column.key)
+        if isinstance(value, (datetime, date, uuid.UUID)):
+            value = value.isoformat() if not isinstance(value, uuid.UUID) else str(value)
+        data[column.key] = value
+    return data
+
+
+def user_from_cache(data: dict) -> User:
+    """Rebuild a detached, read-only User from a cached snapshot."""
+    values = {}
+    for column in _COLUMNS:
+        value = data.get(column.key)
+        if value is not None:
+            if isinstance(column.type, DateTime):
+                value = datetime.fromisoformat(value)
+            elif isinstance(column.type, Date):
+                value = date.fromisoformat(value)
+            elif isinstance(column.type, UUID):
+                value = uuid.UUID(value)
+        values[column.key] = value
+    return User(**values)
+
+
+async def load_user(db: AsyncSession, user_id: str) -> User | None:
+    result = await db.execute(select(User).where(User.id == user_id))
+    return result.scalar_one_or_none()
+
+
+async def get_current_user(
+    user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
+) -> User:
+    """
+    FastAPI dependency: the authenticated User, loaded once per request and
+    attached to the request session. Use for endpoints that modify the user.
+    """
+    user = await load_user(db, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
+
+
+async def get_cached_user(user_id: str = Depends(get_current_user_id)) -> User:
+    """
+    FastAPI dependency: a detached User snapshot served from the profile cache.
+    Read-only — changes to it are never persisted. A cache miss is loaded in
+    its own short session, so the request's session is not pinned by it.
+    """
+    async def load() -> dict:
+        async with async_session_factory() as db:
+            user = await load_user(db, user_id)
+            return user_to_cache(user) if user else {}
+
+    data = await profile_cache.get_or_load(str(user_id), load)
+    if not data:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user_from_cache(data)
+
+
+def invalidate_user(db: AsyncSession, user_id) -> None:
+    """
+    Drop the cached profile now and again once the transaction commits,
+    so a concurrent read cannot re-cache the pre-commit row.
+    """
+    key = str(user_id)
+    profile_cache.local.delete(key)
+    pending = db.info.setdefault("invalidated_users", set())
+    if key not in pending:
+        pending.add(key)
+        after_commit(db, lambda: profile_cache.invalidate(key))
+
+
+def _data_version_key(user_id) -> str:
+    return f"data_version:{user_id}"
+
+
+async def _store_data_version(user_id, version: int) -> None:
+    redis = get_redis()
+    if redis is None:
+        return
+    script = _set_if_greater.get(id(redis))
+    if script is None:
+        script = _set_if_greater[id(redis)] = redis.register_script(SET_IF_GREATER_LUA)
+    try:
+        await script(keys=[_data_version_key(user_id)], args=[version, settings.DATA_VERSION_TTL])
+    except Exception as e:
+        print(f"⚠️ Data version publish failed: {e}")
+
+
+def data_version_changed(db: AsyncSession, user_id, version: int) -> None:
+    """Publish a version written in this transaction once it commits (highest one wins)."""
+    key = str(user_id)
+    pending = db.info.setdefault("data_versions", {})
+    if key not in pending:
+        after_commit(db, lambda: _store_data_version(key, pending[key]))
+    pending[key] = max(version, pending.get(key, 0))
+
+
+async def bump_data_version(db: AsyncSession, user_id) -> int:
+    """
+    Mark the user's data as changed in the current transaction. Call it with
+    every write to food_log, workouts, weight_log, achievements or users
+    (process_event bumps as part of its own UPDATE).
+    """
+    invalidate_user(db, user_id)
+    result = await db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(data_version=User.data_version + 1)
+        .returning(User.data_version)
+    )
+    version = result.scalar_one()
+    data_version_changed(db, user_id, version)
+    return version
+
+
+async def get_data_version(user_id) -> int:
+    """Current data version: Redis, or a primary-key lookup when Redis has none."""
+    redis = get_redis()
+    if redis is not None:
+        try:
+            cached = await redis.get(_data_version_key(user_id))
+            if cached is not None:
+                return int(cached)
+        except Exception:
+            redis = None
+
+    async with async_session_factory() as db:
+        result = await db.execute(select(User.data_version).where(User.id == user_id))
+        version = result.scalar_one_or_none() or 0
+    if redis is not None:
+        await _store_data_version(user_id, version)
+    return version
+
+
+def version_etag(user_id, version: int, request: Request) -> str:
+    # The user id keeps versions of different users apart; path and query
+    # tell endpoints and parameters apart; the hour rolls over payloads that
+    # change with the clock alone (days left, streaks lapsing)
+    scope = f"{user_id}:{request.url.path}?{request.url.query}:{int(time.time() // 3600)}"
+    return f'W/"{version}-{hashlib.sha256(scope.encode()).hexdigest()[:16]}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag.removeprefix("W/") in candidates or "*" in candidates
+
+
+async def get_versioned_user(
+    request: Request,
+    response: Response,
+    user_id: str = Depends(get_current_user_id),
+) -> User:
+    """
+    FastAPI dependency for conditional GETs: answers If-None-Match with 304
+    from the data version alone, before any query runs. Otherwise returns
+    the cached User (reloaded if older than that version) and sets the ETag.
+    """
+    version = await get_data_version(user_id)
+    etag = version_etag(user_id, version, request)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request, etag):
+        raise HTTPException(status_code=304, headers=headers)
+
+    user = await get_cached_user(user_id)
+    if (user.data_version or 0) < version:
+        # Both tiers: Redis may hold the same stale snapshot
+        await profile_cache.invalidate(str(user_id))
+        user = await get_cached_user(user_id)
+
+    # Never label an older snapshot with the newer version
+    response.headers.update(headers)
+    if (user.data_version or 0) < version:
+        response.headers["ETag"] = version_etag(user_id, user.data_version or 0, request)
+    return user
@@ -0,0 +1,143 @@
+"""Benchmark and check the shared outbound HTTP client against a loopback server.
+
+Usage (from backend/):
+    python -m benchmarks.http_client [--concurrency N] [--handshake-ms MS] [--requests N]
+
+No network is needed. The stub server waits --handshake-ms before serving a
+new connection, standing in for the TCP+TLS setup to Open Food Facts.
+
+1. Lifecycle: init/get share one client, sequential requests reuse a single
+   keep-alive connection, and close/re-create behave.
+2. Latency: p50/p99 of N concurrent searches with a new AsyncClient per
+   request (the old search_open_food_facts) against the shared client,
+   with a cold and a warm pool.
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from app.core import http
+
+RESPONSE = b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: 2\r\n\r\n{}"
+
+
+class StubServer:
+    def __init__(self, handshake: float):
+        self.handshake = handshake
+        self.connections = 0
+        self.url = ""
+        self._server: asyncio.Server | None = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        await asyncio.sleep(self.handshake)
+        try:
+            while await reader.readuntil(b"\r\n\r\n"):
+                writer.write(RESPONSE)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def __aenter__(self) -> "StubServer":
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.url = f"http://127.0.0.1:{self._server.sockets[0].getsockname()[1]}/"
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self._server.close()
+        await self._server.wait_closed()
+
+
+async def check_lifecycle(requests: int) -> dict[str, bool]:
+    checks = {}
+    async with StubServer(handshake=0) as server:
+        client = await http.init_http_client()
+        checks["init and get share one client"] = http.get_http_client() is client
+
+        statuses = [(await client.get(server.url)).status_code for _ in range(requests)]
+        checks[f"{requests} requests succeed"] = statuses == [200] * requests
+        checks[f"one keep-alive connection (saw {server.connections})"] = server.connections == 1
+
+        await http.close_http_client()
+        checks["close releases the client"] = client.is_closed and http._client is None
+
+        reopened = http.get_http_client()
+        checks["get after close creates a new client"] = reopened is not client and not reopened.is_closed
+        await http.close_http_client()
+        await http.close_http_client()
+        checks["close is idempotent"] = http._client is None
+    return checks
+
+
+async def _per_request_client(url: str) -> None:
+    async with httpx.AsyncClient(timeout=5.0) as client:
+        (await client.get(url)).raise_for_status()
+
+
+async def _shared_client(url: str) -> None:
+    (await http.get_http_client().get(url)).raise_for_status()
+
+
+async def _measure(fetch, url: str, concurrency: int) -> list[float]:
+    async def timed() -> float:
+        start = time.perf_counter()
+        await fetch(url)
+        return (time.perf_counter() - start) * 1000
+
+    return sorted(await asyncio.gather(*(timed() for _ in range(concurrency))))
+
+
+def _percentile(samples: list[float], p: float) -> float:
+    return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+
+async def benchmark(concurrency: int, handshake: float) -> list[tuple[str, list[float], int]]:
+    rows = []
+    async with StubServer(handshake) as server:
+        before = server.connections
+        samples = await _measure(_per_request_client, server.url, concurrency)
+        rows.append(("new client per request", samples, server.connections - before))
+
+        await http.init_http_client()
+        before = server.connections
+        samples = await _measure(_shared_client, server.url, concurrency)
+        rows.append(("shared client, cold pool", samples, server.connections - before))
+
+        before = server.connections
+        samples = await _measure(_shared_client, server.url, concurrency)
+        rows.append(("shared client, warm pool", samples, server.connections - before))
+        await http.close_http_client()
+    return rows
+
+
+async def run(concurrency: int, handshake_ms: float, requests: int) -> bool:
+    checks = await check_lifecycle(requests)
+    for name, ok in checks.items():
+        print(f"{'✅' if ok else '❌'} {name}")
+
+    print(f"\n{concurrency} concurrent searches, {handshake_ms:g} ms simulated handshake")
+    for name, samples, connections in await benchmark(concurrency, handshake_ms / 1000):
+        print(
+            f"  {name:<26} p50 {_percentile(samples, 0.50):7.1f} ms   "
+            f"p99 {_percentile(samples, 0.99):7.1f} ms   {connections:3d} new connections"
+        )
+    return all(checks.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the shared HTTP client against a loopback server")
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--handshake-ms", type=float, default=50.0)
+    parser.add_argument("--requests", type=int, default=20)
+    args = parser.parse_args()
+    if not asyncio.run(run(args.concurrency, args.handshake_ms, args.requests)):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()